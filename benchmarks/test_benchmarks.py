@@ -0,0 +1,125 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Throughput of the hot paths, using pytest-benchmark.
+
+Run with `pytest benchmarks`, and compare runs with `--benchmark-autosave` and `--benchmark-compare`.
+"""
+import os
+import shutil
+import time
+from functools import wraps
+
+import pytest
+
+from benchmarks.trees import make_config, make_default_config, make_lines, make_tree
+from snippet import workflow
+from snippet._internal import file_wrangler
+from snippet.snippet import extract_snippets_from_bytes, extract_snippets_from_text
+
+# latency added to each file system operation by the slow file system stand-in
+LATENCY = 0.005
+
+
+@pytest.fixture
+def slow_file_system(monkeypatch):
+    """Adds latency to reading and writing files, standing in for a network file system."""
+
+    def slow(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            time.sleep(LATENCY)
+            return function(*args, **kwargs)
+
+        return wrapper
+
+    for name in ("has_markers", "iter_file_lines", "iter_file_bytes", "replace_file", "_append"):
+        monkeypatch.setattr(file_wrangler, name, slow(getattr(file_wrangler, name)))
+
+
+@pytest.mark.parametrize("number_of_lines", [1000, 10000])
+@pytest.mark.parametrize("snippet_density", [0.0, 0.05, 0.5])
+@pytest.mark.parametrize("number_of_phrases", [1, 20])
+def test_extract_snippets_from_text(benchmark, tmp_path, number_of_lines, snippet_density, number_of_phrases):
+    lines = make_lines(number_of_lines, snippet_density)
+    config = make_config(str(tmp_path), number_of_phrases)
+    benchmark(extract_snippets_from_text, config, lines, "module.py")
+
+
+@pytest.mark.parametrize("snippet_density", [0.0, 0.25])
+def test_extract_snippets_with_default_config(benchmark, tmp_path, snippet_density):
+    # compares with earlier versions, which had neither the options nor the phrases of `make_config`
+    lines = make_lines(2000, snippet_density)
+    benchmark(extract_snippets_from_text, make_default_config(str(tmp_path)), lines, "module.py")
+
+
+@pytest.mark.parametrize("number_of_lines", [1000, 10000])
+@pytest.mark.parametrize("snippet_density", [0.0, 0.05, 0.5])
+def test_extract_snippets_from_bytes(benchmark, tmp_path, number_of_lines, snippet_density):
+    lines = [line.encode("utf8") for line in make_lines(number_of_lines, snippet_density)]
+    config = make_config(str(tmp_path))
+    benchmark(extract_snippets_from_bytes, config, lines, "module.py")
+
+
+@pytest.mark.parametrize("number_of_files", [100, 1000])
+def test_find_files(benchmark, tmp_path, number_of_files):
+    make_tree(str(tmp_path), number_of_files, lines_per_file=1, snippet_density=0.0)
+    config = make_config(str(tmp_path))
+    workflow._set_config(config)
+    paths = benchmark(file_wrangler.find_files, config)
+    assert len(paths) == number_of_files
+
+
+@pytest.mark.parametrize("complex_template", [False, True], ids=["simple_template", "complex_template"])
+@pytest.mark.parametrize("number_of_lines", [10, 1000])
+def test_write_example(benchmark, tmp_path, complex_template, number_of_lines):
+    config = make_config(str(tmp_path), complex_template=complex_template)
+    workflow._set_config(config)
+    example_block = "\n".join(f"value_{i} = compute({i})" for i in range(number_of_lines))
+    benchmark(file_wrangler.write_example, config, "snippet 0", example_block)
+
+
+@pytest.mark.parametrize("number_of_files", [10, 200])
+@pytest.mark.parametrize("lines_per_file", [100, 2000])
+@pytest.mark.parametrize("snippet_density", [0.0, 0.1])
+def test_workflow_run(benchmark, tmp_path, number_of_files, lines_per_file, snippet_density):
+    make_tree(str(tmp_path), number_of_files, lines_per_file, snippet_density)
+    output_dir = os.path.join(str(tmp_path), "output")
+
+    def setup():
+        # every round starts from the same state
+        shutil.rmtree(output_dir, ignore_errors=True)
+        return (make_config(str(tmp_path)),), dict()
+
+    examples, paths, failures = benchmark.pedantic(workflow.run, setup=setup, rounds=5)
+    assert len(paths) == number_of_files
+    assert not failures
+
+
+def test_workflow_run_with_default_config(benchmark, tmp_path):
+    make_tree(str(tmp_path), number_of_files=200, lines_per_file=100, snippet_density=0.25)
+    output_dir = os.path.join(str(tmp_path), "output")
+
+    def setup():
+        # outputs are appended to by default
+        shutil.rmtree(output_dir, ignore_errors=True)
+        return (make_default_config(str(tmp_path)),), dict()
+
+    examples, paths, failures = benchmark.pedantic(workflow.run, setup=setup, rounds=5)
+    assert not failures
+
+
+@pytest.mark.parametrize("io_concurrency", [1, 8])
+def test_workflow_run_on_slow_file_system(benchmark, tmp_path, slow_file_system, io_concurrency):
+    make_tree(str(tmp_path), number_of_files=50, lines_per_file=100, snippet_density=0.1)
+    output_dir = os.path.join(str(tmp_path), "output")
+
+    def setup():
+        shutil.rmtree(output_dir, ignore_errors=True)
+        config = make_config(str(tmp_path))
+        config.io_concurrency = io_concurrency
+        return (config,), dict()
+
+    examples, paths, failures = benchmark.pedantic(workflow.run, setup=setup, rounds=3)
+    assert not failures
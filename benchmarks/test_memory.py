@@ -0,0 +1,50 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import tracemalloc
+import unittest
+
+from snippet.snippet import Example, Examples
+
+NUMBER_OF_EXAMPLES = 10000
+LINES_PER_EXAMPLE = 5
+
+
+def without_slots(cls):
+    # the same class, with its attributes held in a per-instance dictionary
+    members = {k: v for k, v in vars(cls).items() if k not in cls.__slots__ and k != "__slots__"}
+    return type(cls.__name__, cls.__bases__, members)
+
+
+def allocated_bytes(example_class):
+    lines = [f"line {i}" for i in range(LINES_PER_EXAMPLE)]
+    tracemalloc.start()
+    try:
+        examples = Examples()
+        for i in range(NUMBER_OF_EXAMPLES):
+            examples.set_current(example_class("path.py", i, f"example {i}", "    # an example: name"), i)
+            for line in lines:
+                examples.add_line(line)
+            examples.store_current(i)
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return size
+
+
+class TestExampleMemory(unittest.TestCase):
+    def test_slots_reduce_memory(self):
+        slotted = allocated_bytes(Example)
+        unslotted = allocated_bytes(without_slots(Example))
+        print(
+            f"\n{NUMBER_OF_EXAMPLES} examples of {LINES_PER_EXAMPLE} lines: {slotted / NUMBER_OF_EXAMPLES:.0f} bytes "
+            f"per example with slots, {unslotted / NUMBER_OF_EXAMPLES:.0f} bytes without "
+            f"({100 * (1 - slotted / unslotted):.0f}% less)"
+        )
+        self.assertLess(slotted, unslotted)
+
+    def test_no_instance_dictionaries(self):
+        example = Example("path.py", 0, "name", "")
+        self.assertFalse(hasattr(example, "__dict__"))
+        self.assertFalse(hasattr(Examples(), "__dict__"))
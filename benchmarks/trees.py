@@ -0,0 +1,78 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Synthetic source trees for benchmarks."""
+import os
+import random
+from pathlib import Path
+from typing import List
+
+from snippet.config import Config
+
+# a mustache template using sections and comments, which cannot be rendered without pystache
+COMPLEX_TEMPLATE = (
+    "{{! generated }}{{#language_name}}```{{language_name}}{{/language_name}}\n"
+    "{{comment_prefix}}example: {{{name}}}{{comment_suffix}}\n{{{code}}}\n```\n"
+)
+
+
+def make_lines(number_of_lines: int, snippet_density: float, first_name: int = 0, seed: int = 0) -> List[str]:
+    """Makes the lines of a source file, a `snippet_density` fraction of them being in examples of 10 lines."""
+    rng = random.Random(seed)
+    lines = list()
+    name = first_name
+    while len(lines) < number_of_lines:
+        if rng.random() < snippet_density:
+            lines.append(f"    # an example: snippet {name}\n")
+            lines.extend(f"    value_{i} = self.compute({i}, 'text')  # a comment\n" for i in range(8))
+            lines.append("    # end of example\n")
+            name += 1
+        else:
+            lines.extend(f"def function_{len(lines)}(argument):\n    return argument * {i}\n" for i in range(5))
+    return lines
+
+
+def make_tree(
+    root: str, number_of_files: int, lines_per_file: int, snippet_density: float, files_per_directory: int = 20
+) -> List[str]:
+    """Makes a tree of source files, with examples named uniquely across files."""
+    paths = list()
+    first_name = 0
+    for i in range(number_of_files):
+        path = Path(root).joinpath("src", f"package_{i // files_per_directory}", f"module_{i}.py")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lines = make_lines(lines_per_file, snippet_density, first_name, seed=i)
+        first_name += sum(1 for line in lines if "an example" in line)
+        path.write_text("".join(lines), encoding="utf8")
+        paths.append(str(path))
+    for name in ("build", ".git", "node_modules"):
+        directory = Path(root).joinpath(name)
+        directory.mkdir()
+        for i in range(files_per_directory):
+            directory.joinpath(f"file_{i}.py").write_text("pass\n", encoding="utf8")
+    return paths
+
+
+def make_default_config(root: str) -> Config:
+    """Makes a config for a tree, leaving every other option to its default."""
+    config = Config()
+    config.project_root = root
+    config.input_glob = [os.path.join("src", "**", "*.py")]
+    config.output_dir = "output"
+    return config
+
+
+def make_config(root: str, number_of_phrases: int = 1, complex_template: bool = False) -> Config:
+    """Makes a config for a tree, with `number_of_phrases` of each of replacements, dropped lines and triggers."""
+    config = Config()
+    config.project_root = root
+    config.input_glob = [os.path.join("src", "**", "*.py")]
+    config.output_dir = "output"
+    config.output_append = False
+    config.replacements = {"self.": "", **{f"replaced_{i}": f"r{i}" for i in range(number_of_phrases - 1)}}
+    config.drop_lines = [f"dropped_{i}" for i in range(number_of_phrases)]
+    config.fail_on_contains = ["assert", *[f"forbidden_{i}" for i in range(number_of_phrases - 1)]]
+    if complex_template:
+        config.output_template = COMPLEX_TEMPLATE
+    return config
@@ -0,0 +1 @@
+Added `cache_path` option to cache extraction results and only re-parse files which changed since the previous run.
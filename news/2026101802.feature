@@ -0,0 +1 @@
+Added `workers` option and `--jobs` flag to parse files in parallel processes.
@@ -0,0 +1 @@
+Improved parsing speed by matching markers and configured phrases with expressions compiled once per configuration.
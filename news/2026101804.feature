@@ -0,0 +1 @@
+Files without any markers are skipped without being decoded, and phrases in `fail_on_contains` are now only checked within examples, as documented.
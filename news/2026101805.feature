@@ -0,0 +1 @@
+Input files are streamed through the parser rather than loaded into memory, so memory use no longer grows with file size.
@@ -0,0 +1 @@
+Examples sharing an output file are written with a single call, and overwritten output files are replaced atomically.
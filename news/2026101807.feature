@@ -0,0 +1 @@
+Added `output_skip_unchanged` option to leave output files untouched when their content would not change.
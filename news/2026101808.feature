@@ -0,0 +1 @@
+Output templates are parsed once per run, and simple templates are rendered without pystache.
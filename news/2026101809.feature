@@ -0,0 +1 @@
+Added `--watch` mode, which keeps the output up to date as input files change.
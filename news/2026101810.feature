@@ -0,0 +1 @@
+Config files are discovered without parsing every `.toml` file of the project, skipping hidden, dependency and virtual environment directories, and searching parent directories up to the repository root when needed.
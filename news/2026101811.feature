@@ -0,0 +1 @@
+File discovery walks the file system once for all input globs, without duplicates, and supports `exclude_glob` and `ignore_files` options.
@@ -0,0 +1 @@
+Added a `--since REF` option, only writing the examples of files changed since a git ref.
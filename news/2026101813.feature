@@ -0,0 +1 @@
+Added `api.iter_code_snippets`, yielding the snippets of each file as soon as it is parsed.
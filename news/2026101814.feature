@@ -0,0 +1 @@
+Examples are held in slots, reducing the memory used by projects with many examples.
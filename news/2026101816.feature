@@ -0,0 +1 @@
+Added a `--stats` option reporting the time taken by each stage and what was read and written; `extract_code_snippets` returns these figures.
@@ -0,0 +1 @@
+Added a `manifest_path` option, writing a JSON or NDJSON manifest of the examples found with their source lines, content hash and output file.
@@ -0,0 +1 @@
+Added an `io_concurrency` option, reading and writing several files at the same time to overlap slow I/O.
@@ -0,0 +1 @@
+Dependencies and modules only needed by some runs are imported when used, reducing start-up time.
@@ -0,0 +1 @@
+Added `api.SnippetSession`, for extracting snippets repeatedly from a long-lived process, only processing the files which changed.
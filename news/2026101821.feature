@@ -0,0 +1 @@
+All the duplicate example names are reported at once, and `name_index_path` lets `--since` runs check names without parsing unchanged files.
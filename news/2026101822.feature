@@ -0,0 +1 @@
+Added `--shard I/N` for splitting extraction across CI agents, and `--merge` for combining the artifacts of the shards.
@@ -0,0 +1 @@
+Markers are found in the raw bytes of input files, only decoding the lines of examples, binary files are skipped, and `encodings` sets the encoding of the files matching globs.
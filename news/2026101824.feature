@@ -0,0 +1 @@
+Added `[snippet.profiles.*]` tables, extracting the examples of several profiles (e.g. languages) with a single traversal of the project.
@@ -0,0 +1 @@
+Compiled replacements into a single pass where possible, and added `replacement_patterns` and `drop_patterns` for regular expressions.
@@ -0,0 +1,150 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Persistent cache of the snippets extracted from each file.
+
+The modules used for hashing and serialising are only imported once the cache is used, as it is optional.
+"""
+import os
+from functools import partial
+from typing import Dict, Optional, Tuple
+
+from snippet.config import Config, PARSING_OPTIONS
+from snippet._internal.logs import LOGGER
+
+CACHE_FORMAT_VERSION = 2
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def config_fingerprint(config: Config) -> str:
+    """Fingerprints the configuration options which affect parsing."""
+    import hashlib
+    import json
+
+    options = {name: getattr(config, name) for name in PARSING_OPTIONS}
+    return hashlib.sha1(json.dumps(options, sort_keys=True, default=str).encode("utf8")).hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """Hashes the content of a file."""
+    import hashlib
+
+    digest = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for chunk in iter(partial(fh.read, READ_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """Snippets previously extracted from files, keyed by path, file signature and content hash.
+
+    Cached results are only reused whilst the parsing options of the configuration are unchanged.
+    The cache is disabled when `cache_path` is not set in the configuration.
+    """
+
+    def __init__(self, config: Config) -> None:
+        """Initialiser."""
+        self._path = config.cache_path
+        self._fingerprint = config_fingerprint(config) if self._path else ""
+        self._entries: Dict[str, dict] = dict()
+        self._seen: Dict[str, dict] = dict()
+        self._pending: Dict[str, Tuple[os.stat_result, Optional[str]]] = dict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        """States whether caching is enabled."""
+        return bool(self._path)
+
+    def load(self) -> None:
+        """Loads the cache from disk."""
+        if not self._path or not os.path.exists(self._path):
+            return
+        import json
+
+        try:
+            with open(self._path, encoding="utf8") as fh:
+                contents = json.load(fh)
+        except (OSError, ValueError) as e:
+            LOGGER.debug("ignoring unreadable cache %s: %s", self._path, e)
+            return
+        if contents.get("version") != CACHE_FORMAT_VERSION or contents.get("fingerprint") != self._fingerprint:
+            LOGGER.debug("ignoring outdated cache %s", self._path)
+            return
+        self._entries = contents.get("files", dict())
+
+    def save(self) -> None:
+        """Saves the entries seen during this run to disk."""
+        if not self._path:
+            return
+        import json
+        import tempfile
+
+        contents = dict(version=CACHE_FORMAT_VERSION, fingerprint=self._fingerprint, files=self._seen)
+        cache_dir = os.path.dirname(os.path.abspath(self._path))
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=".snippet-cache-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf8") as fh:
+                json.dump(contents, fh)
+            os.replace(tmp_path, self._path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, path: str, refresh: bool = False) -> Optional[Tuple[dict, dict]]:
+        """Gets the snippets cached for a file, with their line ranges, if the file is unchanged.
+
+        Files are checked before they are parsed, so that their snippets are only stored if they are not modified
+        whilst being parsed. With `refresh`, the file is parsed again whatever the cache holds.
+        """
+        if not self._path:
+            return None
+        stat = os.stat(path)
+        digest = None
+        entry = None if refresh else self._entries.get(path)
+        if entry and entry["size"] == stat.st_size:
+            if entry["mtime_ns"] == stat.st_mtime_ns:
+                return self._hit(path, entry)
+            digest = file_digest(path)
+            if entry["digest"] == digest:
+                # touched but not modified
+                entry["mtime_ns"] = stat.st_mtime_ns
+                return self._hit(path, entry)
+        self.misses += not refresh
+        self._pending[path] = (stat, digest)
+        return None
+
+    def put(self, path: str, examples: dict, line_ranges: dict) -> None:
+        """Stores the snippets extracted from a file, with their line ranges."""
+        if not self._path:
+            return
+        pending = self._pending.pop(path, None)
+        if pending is None:
+            # the file was not checked before it was parsed
+            return
+        stat, digest = pending
+        digest = digest or file_digest(path)
+        new_stat = os.stat(path)
+        if (new_stat.st_mtime_ns, new_stat.st_size) != (stat.st_mtime_ns, stat.st_size):
+            LOGGER.debug("not caching %s, it was modified whilst being parsed", path)
+            return
+        entries = list()
+        for key, code_lines in examples.items():
+            _, line_num, name = key
+            entries.append([line_num, name, code_lines, line_ranges[key][1]])
+        self._seen[path] = dict(mtime_ns=stat.st_mtime_ns, size=stat.st_size, digest=digest, examples=entries)
+
+    def _hit(self, path: str, entry: dict) -> Tuple[dict, dict]:
+        self.hits += 1
+        self._seen[path] = entry
+        examples = dict()
+        line_ranges = dict()
+        for line_num, example_name, code_lines, end_line_num in entry["examples"]:
+            key = (path, line_num, example_name)
+            examples[key] = code_lines
+            line_ranges[key] = (line_num, end_line_num)
+        return examples, line_ranges
@@ -0,0 +1,363 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Finding the files matching any of several glob patterns, in a single traversal of the file system.
+
+Patterns follow the rules of `glob.glob(..., recursive=True)`: `**` matches any number of directories, and
+wildcards do not match hidden names (starting with a dot) unless the pattern starts with a dot too.
+"""
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Pattern, Set, Tuple, Union
+
+MAGIC_CHARACTERS = re.compile(r"[*?\[]")
+CASE_FLAGS = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+
+
+class Wildcard(NamedTuple):
+    """A pattern component with wildcards."""
+
+    regex: Pattern
+    matches_hidden: bool
+
+
+# pattern components are literal names, wildcards, or None for `**`
+Component = Union[str, Wildcard, None]
+# the state of matching a pattern, i.e. the pattern and the position of the component to match next
+State = Tuple[int, int]
+
+
+class IgnoreRules:
+    """Rules for leaving paths out, from exclude globs and .gitignore-style ignore files.
+
+    The last rule matching a path decides whether it is ignored, so that ignore files may negate rules with `!`.
+    """
+
+    def __init__(self) -> None:
+        """Initialiser."""
+        self._rules: List[Tuple[Pattern, bool, bool]] = list()  # regex, negation, only matching directories
+
+    def add_globs(self, patterns: Iterable[str]) -> None:
+        """Adds (absolute) glob patterns of paths to ignore."""
+        for pattern in patterns:
+            self._rules.append((_compile_path_pattern("", _to_posix(pattern)), False, False))
+
+    def add_ignore_file(self, path: str) -> None:
+        """Adds the rules of an ignore file, which apply relative to the directory containing it."""
+        base = _to_posix(os.path.dirname(path)).rstrip("/") + "/"
+        with open(path, encoding="utf8", errors="replace") as fh:
+            for line in fh:
+                rule = line.strip()
+                if not rule or rule.startswith("#"):
+                    continue
+                negation = rule.startswith("!")
+                rule = rule[1:] if negation else rule
+                directories_only = rule.endswith("/")
+                rule = rule.strip("/") if "/" in rule.rstrip("/") else "**/" + rule.rstrip("/")
+                self._rules.append((_compile_path_pattern(base, rule), negation, directories_only))
+
+    def copy(self) -> "IgnoreRules":
+        """Copies the rules, so that rules added to the copy only apply within a directory."""
+        rules = IgnoreRules()
+        rules._rules = list(self._rules)
+        return rules
+
+    def is_ignored(self, path: str, is_directory: bool) -> bool:
+        """States whether a path is ignored."""
+        ignored = False
+        posix_path = _to_posix(path)
+        for regex, negation, directories_only in self._rules:
+            if (is_directory or not directories_only) and regex.fullmatch(posix_path):
+                ignored = not negation
+        return ignored
+
+
+def find_files(
+    patterns: Iterable[str], exclude: Iterable[str] = (), ignore_file_names: Iterable[str] = (), root: str = ""
+) -> List[str]:
+    """Finds the files matching any of the patterns, as a sorted list without duplicates.
+
+    Paths matching an exclude pattern, or ignored by an ignore file, are left out and excluded directories are
+    not traversed. Ignore files are read in the directories traversed, and in those from `root` to where the
+    traversal starts.
+    """
+    return sorted(_find_matching_files(list(patterns), exclude, ignore_file_names, root))
+
+
+def find_files_for_each(
+    pattern_sets: List[Tuple[List[str], List[str]]], ignore_file_names: Iterable[str] = (), root: str = ""
+) -> List[List[str]]:
+    """Finds the files of several pairs of patterns and exclude patterns, in a single traversal of the file system.
+
+    The same as calling `find_files` for each pair, as sorted lists. Directories are only left out of the traversal
+    when these are excluded for every pair.
+    """
+    patterns: List[str] = list()
+    owners: List[int] = list()
+    for owner, (include, _) in enumerate(pattern_sets):
+        patterns.extend(include)
+        owners.extend(owner for _ in include)
+    excludes = [{os.path.abspath(pattern) for pattern in exclude} for _, exclude in pattern_sets]
+    common_excludes = set.intersection(*excludes) if excludes else set()
+    matches = _find_matching_files(patterns, common_excludes, ignore_file_names, root)
+
+    results = list()
+    for owner, exclude in enumerate(excludes):
+        # paths excluded for this pair only are left out once found
+        own_excludes = sorted(exclude.difference(common_excludes))
+        rules = IgnoreRules()
+        rules.add_globs(own_excludes)
+        results.append(
+            sorted(
+                path
+                for path, indices in matches.items()
+                if any(owners[index] == owner for index in indices)
+                and not (own_excludes and _is_excluded(rules, path))
+            )
+        )
+    return results
+
+
+def _find_matching_files(
+    patterns: List[str], exclude: Iterable[str], ignore_file_names: Iterable[str], root: str
+) -> Dict[str, Set[int]]:
+    """Finds the files matching any of the patterns, along with the indices of the patterns each one matches."""
+    ignore_file_names = list(ignore_file_names)
+    rules = IgnoreRules()
+    rules.add_globs(os.path.abspath(pattern) for pattern in exclude)
+
+    files: Dict[str, Set[int]] = dict()
+    for top, (indices, components) in _group_patterns([os.path.abspath(pattern) for pattern in patterns]).items():
+        top_rules = rules.copy()
+        for directory in _directories_between(os.path.abspath(root) if root else "", top):
+            _add_ignore_files(top_rules, directory, ignore_file_names)
+        states = {(index, 0) for index in range(len(components))}
+        for path, matched in _walk(top, components, states, top_rules, ignore_file_names):
+            files.setdefault(path, set()).update(indices[index] for index in matched)
+    return files
+
+
+def _is_excluded(rules: IgnoreRules, path: str) -> bool:
+    # the file, or any of the directories containing it
+    if rules.is_ignored(path, False):
+        return True
+    directory = os.path.dirname(path)
+    while os.path.dirname(directory) != directory:
+        if rules.is_ignored(directory, True):
+            return True
+        directory = os.path.dirname(directory)
+    return False
+
+
+def compile_glob(pattern: str) -> Pattern:
+    """Compiles a glob pattern into a regular expression matching absolute paths, with forward slashes."""
+    return _compile_path_pattern("", _to_posix(os.path.abspath(pattern)))
+
+
+def _walk(
+    directory: str, patterns: List[List[Component]], states: Set[State], rules: IgnoreRules, ignore_file_names: list
+) -> Iterator[Tuple[str, Set[int]]]:
+    if ignore_file_names:
+        local_rules = rules.copy()
+        if _add_ignore_files(local_rules, directory, ignore_file_names):
+            rules = local_rules
+    for name, is_directory in _list_candidates(directory, patterns, states):
+        path = os.path.join(directory, name)
+        next_states = _advance(patterns, states, name)
+        if not next_states or rules.is_ignored(path, is_directory):
+            continue
+        if is_directory:
+            yield from _walk(path, patterns, next_states, rules, ignore_file_names)
+            continue
+        matched = _matching_patterns(patterns, states, name)
+        if matched:
+            yield path, matched
+
+
+def _advance(patterns: List[List[Component]], states: Set[State], name: str) -> Set[State]:
+    next_states = set()
+    for index, position in _expand(patterns, states):
+        if position == len(patterns[index]):
+            continue
+        component = patterns[index][position]
+        if component is None:
+            # `**` carries on matching in subdirectories, but not hidden ones
+            if not name.startswith("."):
+                next_states.add((index, position))
+        elif _matches(component, name):
+            next_states.add((index, position + 1))
+    return next_states
+
+
+def _matching_patterns(patterns: List[List[Component]], states: Set[State], name: str) -> Set[int]:
+    """Gets the indices of the patterns matching a file, as `glob` does.
+
+    The name of the file must be matched by the last component, or by a trailing `**`: `foo/**` does not match the
+    file `foo`.
+    """
+    matched = set()
+    for index, position in _expand(patterns, states):
+        components = patterns[index][position:]
+        if not components:
+            continue
+        if components[0] is None:
+            if not name.startswith(".") and all(component is None for component in components):
+                matched.add(index)
+        elif len(components) == 1 and _matches(components[0], name):
+            matched.add(index)
+    return matched
+
+
+def _expand(patterns: List[List[Component]], states: Set[State]) -> Set[State]:
+    # `**` may also match no directory at all
+    expanded = set(states)
+    pending = list(states)
+    while pending:
+        index, position = pending.pop()
+        if position < len(patterns[index]) and patterns[index][position] is None:
+            state = (index, position + 1)
+            if state not in expanded:
+                expanded.add(state)
+                pending.append(state)
+    return expanded
+
+
+def _list_candidates(directory: str, patterns: List[List[Component]], states: Set[State]) -> Iterator[Tuple[str, bool]]:
+    next_components = [
+        patterns[index][position] for index, position in _expand(patterns, states) if position < len(patterns[index])
+    ]
+    literal_names = {component for component in next_components if isinstance(component, str)}
+    if len(literal_names) == len(set(next_components)):
+        # only literal names can match, these are looked up rather than listing the whole directory
+        for name in literal_names:
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                yield name, os.path.isdir(path)
+        return
+    try:
+        with os.scandir(directory) as entries:
+            candidates = [(entry.name, entry.is_dir()) for entry in entries]
+    except OSError:
+        return
+    yield from candidates
+
+
+def _matches(component: Union[str, Wildcard], name: str) -> bool:
+    if isinstance(component, str):
+        return os.path.normcase(component) == os.path.normcase(name)
+    if name.startswith(".") and not component.matches_hidden:
+        return False
+    return bool(component.regex.fullmatch(name))
+
+
+def _group_patterns(patterns: List[str]) -> Dict[str, Tuple[List[int], List[List[Component]]]]:
+    """Groups patterns by the directory they are matched from, along with their indices in the list of patterns.
+
+    That is the deepest directory common to all of the patterns, unless they span several drives.
+    """
+    by_drive: Dict[str, List[Tuple[int, str, List[str]]]] = dict()
+    for pattern_index, pattern in enumerate(patterns):
+        # the directory before the first wildcard, the last component always being matched whilst traversing
+        directory, name = os.path.split(pattern)
+        remainder = [name]
+        while MAGIC_CHARACTERS.search(directory):
+            directory, name = os.path.split(directory)
+            remainder.insert(0, name)
+        by_drive.setdefault(os.path.splitdrive(directory)[0], list()).append((pattern_index, directory, remainder))
+
+    groups = dict()
+    for drive_patterns in by_drive.values():
+        top = os.path.commonpath([directory for _, directory, _ in drive_patterns])
+        groups[top] = (
+            [pattern_index for pattern_index, _, _ in drive_patterns],
+            [
+                [_parse_component(name) for name in _components(os.path.relpath(directory, top)) + remainder]
+                for _, directory, remainder in drive_patterns
+            ],
+        )
+    return groups
+
+
+def _parse_component(component: str) -> Component:
+    if component == "**":
+        return None
+    if not MAGIC_CHARACTERS.search(component):
+        return component
+    return Wildcard(re.compile(_translate(component), CASE_FLAGS), component.startswith("."))
+
+
+def _compile_path_pattern(base: str, pattern: str) -> Pattern:
+    regex = re.escape(base)
+    components = pattern.split("/")
+    for i, component in enumerate(components):
+        if component == "**":
+            regex += ".*" if i == len(components) - 1 else "(?:.*/)?"
+        else:
+            regex += _translate(component) + ("/" if i < len(components) - 1 else "")
+    return re.compile(regex, CASE_FLAGS)
+
+
+def _translate(component: str) -> str:
+    """Translates a component of a glob pattern into a regular expression, wildcards not crossing directories."""
+    regex = ""
+    i = 0
+    while i < len(component):
+        char = component[i]
+        i += 1
+        if char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif char == "[" and _set_end(component, i) != -1:
+            end = _set_end(component, i)
+            # as fnmatch does, escaping set operations which may have a meaning in future versions of re
+            characters = re.sub(r"([&~|])", r"\\\1", component[i:end].replace("\\", "\\\\"))
+            if characters.startswith("!"):
+                characters = "^" + characters[1:]
+            elif characters.startswith(("^", "[")):
+                characters = "\\" + characters
+            regex += f"[{characters}]"
+            i = end + 1
+        else:
+            regex += re.escape(char)
+    return regex
+
+
+def _set_end(component: str, start: int) -> int:
+    """Finds the `]` closing a set from `start`, a `]` first in the set (or after `!`) being one of its characters."""
+    end = start
+    if component[end:end + 1] == "!":
+        end += 1
+    if component[end:end + 1] == "]":
+        end += 1
+    return component.find("]", end)
+
+
+def _components(path: str) -> List[str]:
+    return [component for component in _to_posix(path).split("/") if component and component != "."]
+
+
+def _directories_between(root: str, top: str) -> List[str]:
+    if not root or os.path.commonpath([root, top]) != root:
+        return list()
+    directories: List[str] = list()
+    directory = top
+    while directory != root:
+        directory = os.path.dirname(directory)
+        directories.insert(0, directory)
+    return directories
+
+
+def _add_ignore_files(rules: IgnoreRules, directory: str, ignore_file_names: Iterable[str]) -> bool:
+    found = False
+    for name in ignore_file_names:
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            rules.add_ignore_file(path)
+            found = True
+    return found
+
+
+def _to_posix(path: str) -> str:
+    return path.replace(os.sep, "/")
@@ -5,60 +5,253 @@
 """Utilities regarding file handling."""
 
 import os
-import glob
+import mmap
+import re
+import threading
 
-import pystache
 import time
-import random
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Generator, Iterable, List, Pattern, Set, Tuple
 
 from snippet.config import Config
+from snippet._internal import file_finder
 from snippet._internal.logs import LOGGER
+from snippet._internal.matcher import get_matcher
+from snippet._internal.templates import compile_template
+from snippet._internal.util import ensure_list
 
+# how much of a file is checked for NUL bytes, which text files (in encodings compatible with ASCII) do not have
+BINARY_SNIFF_SIZE = 8192
+# a `\r` not followed by `\n`, which also ends a line when reading in text mode
+BARE_CARRIAGE_RETURN = re.compile(rb"\r(?!\n)")
+# a line, ending with any of the line breaks of text mode (or at the end of the file)
+RAW_LINE = re.compile(rb"[^\r\n]*(?:\r\n?|\n)|[^\r\n]+")
 
-def write_example(config: Config, example_name: str, example_block: str) -> None:
-    """Writes example to file."""
-    output = pystache.render(
-        config.output_template,
+
+def render_example(config: Config, example_name: str, example_block: str) -> Tuple[str, str]:
+    """Renders an example, returning the path to its output file along with the output."""
+    output = compile_template(config.output_template).render(
         name=example_name,
         code=example_block,
         comment_prefix=config.comment_prefix,
         comment_suffix=config.comment_suffix,
         language_name=config.language_name,
     )
+    return output_path(config, example_name), output
 
-    output_file_name = pystache.render(
-        config.output_file_name_template, name=example_name.strip().replace(" ", "_").lower()
+
+def output_path(config: Config, example_name: str) -> str:
+    """Gets the path to the output file of an example, without rendering the example."""
+    output_file_name = compile_template(config.output_file_name_template).render(
+        name=example_name.strip().replace(" ", "_").lower()
     )
+    return os.path.join(config.output_dir, output_file_name)
+
+
+def write_example(config: Config, example_name: str, example_block: str) -> None:
+    """Writes example to file."""
+    writer = OutputWriter(config)
+    writer.add(example_name, example_block)
+    for output_file in writer.output_files:
+        writer.write(output_file)
+
+
+class OutputWriter:
+    """Writes rendered examples, grouped by output file.
+
+    Each output file is written with a single call, once all the examples have been added.
+    When `overwrite` is set, existing output files are replaced even if examples are appended to each other.
+    Different output files may be written from different threads.
+    """
 
-    if not os.path.exists(config.output_dir):
-        LOGGER.info("creating output directory %s", config.output_dir)
-        os.makedirs(config.output_dir)
-    output_file = os.path.join(config.output_dir, output_file_name)
-    LOGGER.info("writing %r to %s", example_name, output_file)
-    for i in range(1, config.write_attempts + 1):
-        # we run a retry loop as there may be contention on the output file in
-        # a multi-process environment
-        try:
-            with open(output_file, "a" if config.output_append else "w", encoding="utf8") as fh:
-                fh.write(output)
+    def __init__(self, config: Config, overwrite: bool = False) -> None:
+        """Initialiser."""
+        self._config = config
+        self._overwrite = overwrite
+        self._outputs: Dict[str, List[str]] = dict()
+        self._directories: Set[str] = set()
+        self._lock = threading.Lock()
+        self.files_written = 0
+        self.files_unchanged = 0
+        self.bytes_written = 0
+        if config.output_skip_unchanged and config.output_append and not overwrite:
+            LOGGER.warning("output_skip_unchanged has no effect whilst output_append is set")
+
+    @property
+    def output_files(self) -> List[str]:
+        """Gets the output files, in the order examples were added."""
+        return list(self._outputs)
+
+    def add(self, example_name: str, example_block: str) -> None:
+        """Adds an example to its output file."""
+        output_file, output = render_example(self._config, example_name, example_block)
+        LOGGER.info("writing %r to %s", example_name, output_file)
+        if self._config.output_append:
+            self._outputs.setdefault(output_file, list()).append(output)
+        else:
+            # the last example overwrites any other one going to the same file
+            self._outputs[output_file] = [output]
+
+    def write(self, output_file: str) -> None:
+        """Writes an output file."""
+        content = "".join(self._outputs[output_file])
+        appending = self._config.output_append and not self._overwrite
+        if self._config.output_skip_unchanged and not appending and _has_content(output_file, content):
+            # leave the file untouched, so that its modification time does not change
+            LOGGER.debug("%s is unchanged", output_file)
+            with self._lock:
+                self.files_unchanged += 1
+            return
+        directory = os.path.dirname(output_file)
+        if directory not in self._directories:
+            if not os.path.exists(directory):
+                LOGGER.info("creating output directory %s", directory)
+                os.makedirs(directory, exist_ok=True)
+            self._directories.add(directory)
+        for i in range(1, self._config.write_attempts + 1):
+            # we run a retry loop as there may be contention on the output file in
+            # a multi-process environment
+            try:
+                if appending:
+                    _append(output_file, content)
+                else:
+                    _replace(output_file, content)
                 break
-        except IOError as err:
-            time.sleep(i * 0.5 + 0.1 * random.randint(0, 5))
-            LOGGER.info("write failed (%s) retrying attempt: %s", err, i)
-    else:
-        raise IOError("could not write output file after %s attempts" % config.write_attempts)
+            except IOError as err:
+                import random
+
+                time.sleep(i * 0.5 + 0.1 * random.randint(0, 5))
+                LOGGER.info("write failed (%s) retrying attempt: %s", err, i)
+        else:
+            raise IOError("could not write output file after %s attempts" % self._config.write_attempts)
+        with self._lock:
+            self.files_written += 1
+            self.bytes_written += len(content.encode("utf8"))
+
+
+def _has_content(output_file: str, content: str) -> bool:
+    # files are written in text mode, with newlines translated to the platform's line separator
+    expected_size = len(content.encode("utf8")) + content.count("\n") * (len(os.linesep) - 1)
+    try:
+        if os.path.getsize(output_file) != expected_size:
+            return False
+        with open(output_file, encoding="utf8") as fh:
+            return fh.read() == content
+    except (OSError, ValueError):
+        return False
+
+
+def _append(output_file: str, content: str) -> None:
+    with open(output_file, "a", encoding="utf8") as fh:
+        fh.write(content)
+
+
+def _replace(output_file: str, content: str) -> None:
+    replace_file(output_file, [content])
+
 
+def replace_file(path: str, chunks: Iterable[str]) -> None:
+    """Replaces the content of a file, writing the chunks of text one after the other.
 
-def load_file_lines(path: str) -> list:
+    Readers of the file only ever see either the old or the new content.
+    """
+    tmp_path = f"{path}.{os.urandom(8).hex()}.tmp"
+    try:
+        with open(tmp_path, "x", encoding="utf8") as fh:
+            fh.writelines(chunks)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def load_file_lines(path: str, encoding: str = "utf8") -> list:
     """Loads file into memory."""
-    with open(path, "r", encoding="utf8") as fh:
-        lines = fh.readlines()
-    return lines
+    return list(iter_file_lines(path, encoding))
+
+
+def iter_file_lines(path: str, encoding: str = "utf8") -> Generator[str, None, None]:
+    """Reads the lines of a file lazily, so that only the current line is held in memory."""
+    with open(path, "r", encoding=encoding) as fh:
+        yield from fh
+
+
+def iter_file_bytes(path: str) -> Generator[bytes, None, None]:
+    """Reads the raw lines of a file lazily, without decoding them.
+
+    As in text mode, lines end with a line feed, a carriage return and a line feed, or a carriage return alone.
+    """
+    with open(path, "rb") as fh:
+        for line in fh:
+            if b"\r" in line and BARE_CARRIAGE_RETURN.search(line):
+                yield from RAW_LINE.findall(line)
+            else:
+                yield line
+
+
+def has_markers(config: Config, path: str, encoding: str = "utf8") -> bool:
+    """Checks whether a file contains any of the markers, by scanning its raw bytes.
+
+    Binary files, with a NUL byte near their start, are deemed not to. Files in encodings which are not compatible
+    with ASCII are not scanned.
+    """
+    if not is_ascii_compatible(encoding):
+        return True
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return False
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            if content.find(b"\0", 0, BINARY_SNIFF_SIZE) != -1:
+                LOGGER.debug("skipping binary file %s", path)
+                return False
+            return get_matcher(config).has_any_marker(content, encoding)
+
+
+def find_files_for_each(configs: List[Config]) -> List[List[str]]:
+    """Finds the input file paths of several configurations (e.g. profiles), in a single traversal.
+
+    The configurations must have the same `ignore_files`.
+    """
+    ignore_files = {tuple(ensure_list(config.ignore_files)) for config in configs}
+    if len(ignore_files) > 1:
+        raise ValueError("ignore_files must be the same for all the profiles")
+    return file_finder.find_files_for_each(
+        [(ensure_list(config.input_glob), ensure_list(config.exclude_glob)) for config in configs],
+        ignore_files.pop() if ignore_files else (),
+        root=configs[0].project_root if configs else "",
+    )
+
+
+def get_encoding(config: Config, path: str) -> str:
+    """Gets the encoding of an input file, from the first glob of `encodings` matching it."""
+    posix_path = Path(path).as_posix()
+    for regex, encoding in _compile_encodings(config.project_root, tuple(config.encodings.items())):
+        if regex.fullmatch(posix_path):
+            return encoding
+    return config.encoding
+
+
+@lru_cache(maxsize=64)
+def is_ascii_compatible(encoding: str) -> bool:
+    """States whether ASCII text is encoded as is, so that markers and line breaks can be found in raw bytes."""
+    sample = "".join(chr(i) for i in range(128))
+    try:
+        return sample.encode(encoding) == sample.encode("ascii")
+    except UnicodeError:
+        return False
+
+
+@lru_cache(maxsize=16)
+def _compile_encodings(project_root: str, encodings: Tuple[Tuple[str, str], ...]) -> List[Tuple[Pattern, str]]:
+    return [
+        (file_finder.compile_glob(os.path.join(project_root, pattern)), encoding) for pattern, encoding in encodings
+    ]
 
 
 def find_files(config: Config) -> list:
     """Finds input file paths, according to the config."""
-    files = []
-    for glob_pattern in config.input_glob:
-        files.extend(glob.glob(glob_pattern, recursive=True))
-    return files
+    return file_finder.find_files(
+        config.input_glob, config.exclude_glob, ensure_list(config.ignore_files), root=config.project_root
+    )
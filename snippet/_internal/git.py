@@ -0,0 +1,36 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Change detection using the local git CLI."""
+import os
+import subprocess
+from typing import List, Set
+
+from snippet.exceptions import VersionControlError
+
+
+def changed_files(directory: str, ref: str) -> Set[str]:
+    """Gets the real paths of the files changed since a git ref, in the repository containing a directory.
+
+    These are the files differing between the ref and the working tree, including uncommitted changes and files
+    which are not tracked yet (unless they are ignored). Only the local repository is used, nothing is fetched.
+    """
+    top_level = _git(directory, "rev-parse", "--show-toplevel")[0]
+    changed = _git(top_level, "diff", "--name-only", "--no-renames", "-z", ref, "--")
+    untracked = _git(top_level, "ls-files", "--others", "--exclude-standard", "-z")
+    return {os.path.realpath(os.path.join(top_level, path)) for path in changed + untracked}
+
+
+def _git(directory: str, *args: str) -> List[str]:
+    try:
+        result = subprocess.run(
+            ["git", "-C", directory] + list(args), stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+        )
+    except FileNotFoundError as e:
+        raise VersionControlError(f"git is not available: {e}")
+    except subprocess.CalledProcessError as e:
+        message = e.stderr.decode("utf8", errors="replace").strip()
+        raise VersionControlError(f"git {args[0]} failed in {directory}: {message}")
+    separator = "\0" if "-z" in args else "\n"
+    return [line for line in os.fsdecode(result.stdout).strip("\n").split(separator) if line]
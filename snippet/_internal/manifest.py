@@ -0,0 +1,54 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Manifest of the examples found, for other tools to use without parsing the output files."""
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, Iterator, Tuple
+
+from snippet._internal import file_wrangler
+from snippet._internal.util import relative_posix_path
+from snippet.config import Config
+
+MANIFEST_FORMAT_VERSION = 1
+MANIFEST_FORMATS = ("json", "ndjson")
+
+
+def iter_records(config: Config, examples: dict, line_ranges: Dict[tuple, Tuple[int, int]]) -> Iterator[dict]:
+    """Describes each example.
+
+    Paths are relative to the project root, and lines are numbered from 1, from the start flag to the end flag.
+    """
+    for key, code_lines in examples.items():
+        path, line_num, example_name = key
+        start_line_num, end_line_num = line_ranges.get(key, (line_num, line_num))
+        output_file = file_wrangler.output_path(config, example_name)
+        yield dict(
+            name=example_name,
+            path=relative_posix_path(path, config.project_root),
+            start_line=start_line_num + 1,
+            end_line=end_line_num + 1,
+            sha256=hashlib.sha256("\n".join(code_lines).encode("utf8")).hexdigest(),
+            output_path=relative_posix_path(output_file, config.project_root),
+        )
+
+
+def write_manifest(config: Config, examples: dict, line_ranges: Dict[tuple, Tuple[int, int]]) -> None:
+    """Writes the manifest, as a single JSON document or as a JSON document per line (NDJSON).
+
+    NDJSON records are streamed to the file one at a time.
+    """
+    if config.manifest_format not in MANIFEST_FORMATS:
+        raise ValueError(f"unknown manifest format {config.manifest_format!r}, expected one of {MANIFEST_FORMATS}")
+    records = iter_records(config, examples, line_ranges)
+    if config.manifest_format == "ndjson":
+        chunks: Iterable[str] = (json.dumps(record, sort_keys=True) + "\n" for record in records)
+    else:
+        document = dict(version=MANIFEST_FORMAT_VERSION, examples=list(records))
+        chunks = [json.dumps(document, indent=2, sort_keys=True), "\n"]
+    manifest_path = config.manifest_path or ""
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    # readers of the manifest only ever see a complete one
+    file_wrangler.replace_file(manifest_path, chunks)
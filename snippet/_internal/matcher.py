@@ -0,0 +1,189 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Compiled matching of the markers and phrases used whilst parsing."""
+import mmap
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Match, Optional, Pattern, Tuple, Union
+
+from snippet.config import Config
+
+# markers, in order of precedence when several are found on the same line
+START, END, UNCLOAK, CLOAK = range(4)
+
+
+class Matcher:
+    """Finds markers and phrases in a line, with a single scan of the line for each kind of phrase."""
+
+    def __init__(
+        self,
+        markers: Tuple[str, str, str, str],
+        drop_lines: Tuple[str, ...],
+        replacements: Tuple[Tuple[str, str], ...],
+        fail_on_contains: Tuple[str, ...],
+        drop_patterns: Tuple[str, ...] = (),
+        replacement_patterns: Tuple[Tuple[str, str], ...] = (),
+    ) -> None:
+        """Initialiser."""
+        # the lookahead finds markers overlapping each other (e.g. `cloak` within `uncloak`),
+        # and the alternatives are tried in order of precedence at each position
+        self._marker_phrases = markers
+        self._markers = re.compile("(?=%s)" % "|".join(f"({re.escape(marker)})" for marker in markers))
+        self._any_marker: Dict[str, Pattern[bytes]] = dict()  # for raw content, in each encoding
+        self._drop_lines = _compile_phrases(drop_lines)
+        self._drop_patterns = _compile_patterns(drop_patterns)
+        self._replacements = _compile_phrases(before for before, _ in replacements)
+        self._replacement_table = dict(replacements)
+        # replacing all the phrases in a single pass gives the same result as replacing each one in turn,
+        # unless they interact, in which case they are replaced in turn
+        self._chained_replacements = None if _are_independent(replacements) else list(replacements)
+        self._replacement_patterns = [(re.compile(pattern), after) for pattern, after in replacement_patterns]
+        self._fail_on_contains = _compile_phrases(fail_on_contains)
+
+    def find_marker(self, line: str) -> Optional[int]:
+        """Finds the marker with the highest precedence in a line."""
+        # most lines have no marker, which plain substring checks rule out the quickest
+        for marker in self._marker_phrases:
+            if marker in line:
+                break
+        else:
+            return None
+        # the group number of the alternative found at each position gives the precedence of that marker
+        return min(match.lastindex or 0 for match in self._markers.finditer(line)) - 1
+
+    def has_any_marker(self, content: Union[bytes, mmap.mmap], encoding: str = "utf8") -> bool:
+        """States whether raw content contains any of the markers."""
+        return bool(self.any_marker(encoding).search(content))
+
+    def any_marker(self, encoding: str) -> Pattern[bytes]:
+        """Gets the regular expression finding any of the markers in raw content, in an encoding compatible with ASCII.
+
+        A match may be found across characters in multibyte encodings, so matches need checking once decoded.
+        """
+        pattern = self._any_marker.get(encoding)
+        if pattern is None:
+            pattern = re.compile(b"|".join(re.escape(marker.encode(encoding)) for marker in self._marker_phrases))
+            self._any_marker[encoding] = pattern
+        return pattern
+
+    def should_drop(self, line: str) -> bool:
+        """States whether a line contains any of the phrases, or matches any of the patterns, for dropping lines."""
+        if self._drop_lines and self._drop_lines.search(line):
+            return True
+        return any(pattern.search(line) for pattern in self._drop_patterns)
+
+    def needs_replacing(self, line: str) -> bool:
+        """States whether a line contains any of the phrases to replace, or there are patterns to replace."""
+        return bool(self._replacement_patterns or (self._replacements and self._replacements.search(line)))
+
+    def replace(self, line: str) -> str:
+        """Replaces the phrases in a line, then the patterns, each in turn to the result of the previous one."""
+        if self._replacements:
+            if self._chained_replacements is None:
+                line = self._replacements.sub(self._replace_phrase, line)
+            elif self._replacements.search(line):
+                for before, after in self._chained_replacements:
+                    line = line.replace(before, after)
+        for pattern, replacement in self._replacement_patterns:
+            line = pattern.sub(replacement, line)
+        return line
+
+    def has_trigger(self, line: str) -> bool:
+        """States whether a line contains any of the phrases failing validation."""
+        return bool(self._fail_on_contains and self._fail_on_contains.search(line))
+
+    def _replace_phrase(self, match: Match) -> str:
+        return self._replacement_table[match.group()]
+
+
+def get_matcher(config: Config) -> Matcher:
+    """Gets the matcher for the current parsing options of a configuration."""
+    return _get_matcher(
+        (config.start_flag, config.end_flag, config.uncloak_flag, config.cloak_flag),
+        tuple(config.drop_lines),
+        tuple(config.replacements.items()),
+        tuple(config.fail_on_contains),
+        tuple(config.drop_patterns),
+        tuple(config.replacement_patterns.items()),
+    )
+
+
+@lru_cache(maxsize=16)
+def _get_matcher(
+    markers: Tuple[str, str, str, str],
+    drop_lines: Tuple[str, ...],
+    replacements: Tuple[Tuple[str, str], ...],
+    fail_on_contains: Tuple[str, ...],
+    drop_patterns: Tuple[str, ...],
+    replacement_patterns: Tuple[Tuple[str, str], ...],
+) -> Matcher:
+    return Matcher(markers, drop_lines, replacements, fail_on_contains, drop_patterns, replacement_patterns)
+
+
+def _compile_phrases(phrases: Iterable[str]) -> Optional[Pattern]:
+    """Compiles phrases into a regular expression matching any of them.
+
+    The phrases are arranged as a trie (e.g. `assert|assume` becomes `ass(?:ert|ume)`), so that the cost of
+    a search depends on the length of the line rather than on the number of phrases.
+    """
+    trie: dict = dict()
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, dict())
+        node[""] = dict()  # end of a phrase
+    if not trie:
+        return None
+    return re.compile(_trie_pattern(trie))
+
+
+def _trie_pattern(node: dict) -> str:
+    alternatives = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not alternatives:
+        return ""
+    pattern = alternatives[0] if len(alternatives) == 1 else "(?:%s)" % "|".join(alternatives)
+    # a phrase may end here, whilst longer ones carry on
+    return f"(?:{pattern})?" if "" in node else pattern
+
+
+def _compile_patterns(patterns: Iterable[str]) -> List[Pattern]:
+    """Compiles regular expressions, combining them into one matching any of them where possible.
+
+    Patterns with groups (which may be referred to by number) or flags are kept apart.
+    """
+    compiled = [re.compile(pattern) for pattern in patterns]
+    plain = [pattern for pattern in compiled if not pattern.groups and pattern.flags == re.UNICODE]
+    if len(plain) < 2:
+        return compiled
+    others = [pattern for pattern in compiled if pattern not in plain]
+    return [re.compile("|".join(f"(?:{pattern.pattern})" for pattern in plain)), *others]
+
+
+def _are_independent(replacements: Iterable[Tuple[str, str]]) -> bool:
+    """States whether replacing the phrases in a single pass gives the same result as replacing each one in turn.
+
+    That is the case unless a phrase overlaps another one, or the result of a replacement may contain the phrase of
+    a later one: either overlapping the replacement, or across text brought together by an empty replacement.
+    """
+    replacements = list(replacements)
+    phrases = [before for before, _ in replacements]
+    if not all(phrases):
+        return False
+    for i, (before, after) in enumerate(replacements):
+        if any(_overlap(before, other) for other in phrases[:i]):
+            return False
+        for later in phrases[i + 1:]:
+            if (after and _overlap(after, later)) or (not after and len(later) > 1):
+                return False
+    return True
+
+
+def _overlap(first: str, second: str) -> bool:
+    """States whether two strings overlap, one containing the other or the end of one being the start of the other."""
+    if first in second or second in first:
+        return True
+    return any(first.endswith(second[:i]) for i in range(1, len(second))) or any(
+        second.endswith(first[:i]) for i in range(1, len(first))
+    )
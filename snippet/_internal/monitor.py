@@ -0,0 +1,137 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Monitoring of file changes, using inotify where available and polling otherwise."""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple, Union
+
+from snippet._internal.logs import LOGGER
+
+# inotify constants, from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# how long to wait for more changes after a first one, so that a burst of changes is handled at once
+SETTLE_TIME = 0.02
+
+
+class PollingMonitor:
+    """Detects changes to files by comparing their modification time and size."""
+
+    def __init__(self, interval: float) -> None:
+        """Initialiser."""
+        self._interval = interval
+        self._signatures: Dict[str, Optional[Tuple[int, int]]] = dict()
+
+    def track(self, paths: Iterable[str]) -> None:
+        """Sets the files to monitor."""
+        self._signatures = {path: self._signatures.get(path) or _signature(path) for path in paths}
+
+    def wait(self, timeout: float) -> Set[str]:
+        """Waits for changes, returning the paths which changed."""
+        changed: Set[str] = set()
+        deadline = time.monotonic() + timeout
+        while not changed and time.monotonic() < deadline:
+            time.sleep(min(self._interval, max(0.0, deadline - time.monotonic())))
+            changed = self.poll()
+        return changed
+
+    def poll(self, paths: Optional[Iterable[str]] = None) -> Set[str]:
+        """Checks the files once (or only some of them), returning the paths which changed."""
+        changed = set()
+        for path in self._signatures if paths is None else paths:
+            new_signature = _signature(path)
+            if new_signature != self._signatures.get(path):
+                self._signatures[path] = new_signature
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        """Stops monitoring."""
+        self._signatures.clear()
+
+
+class InotifyMonitor:
+    """Detects changes to files with inotify, watching the directories containing them.
+
+    Files created in those directories are reported too, even when they are not tracked.
+    """
+
+    def __init__(self, libc: ctypes.CDLL) -> None:
+        """Initialiser."""
+        self._libc = libc
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories: Dict[int, str] = dict()
+
+    def track(self, paths: Iterable[str]) -> None:
+        """Sets the files to monitor."""
+        watched = set(self._directories.values())
+        for directory in {os.path.dirname(path) for path in paths} - watched:
+            descriptor = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+            if descriptor < 0:
+                LOGGER.debug("cannot watch %s: %s", directory, os.strerror(ctypes.get_errno()))
+                continue
+            self._directories[descriptor] = directory
+
+    def wait(self, timeout: float) -> Set[str]:
+        """Waits for changes, returning the paths which changed."""
+        changed: Set[str] = set()
+        while select.select([self._fd], [], [], SETTLE_TIME if changed else timeout)[0]:
+            changed.update(self._read_events())
+        return changed
+
+    def close(self) -> None:
+        """Stops monitoring."""
+        os.close(self._fd)
+
+    def _read_events(self) -> Set[str]:
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        paths = set()
+        offset = 0
+        while offset < len(data):
+            descriptor, _, _, name_length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+            directory = self._directories.get(descriptor)
+            if directory and name:
+                paths.add(os.path.join(directory, os.fsdecode(name)))
+        return paths
+
+
+def create_monitor(interval: float) -> Union[InotifyMonitor, PollingMonitor]:
+    """Creates a monitor using inotify where available, falling back to polling every `interval` seconds."""
+    if sys.platform.startswith("linux"):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            return InotifyMonitor(libc)
+        except (OSError, AttributeError) as e:
+            LOGGER.debug("inotify is not available (%s), polling instead", e)
+    return PollingMonitor(interval)
+
+
+def _signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
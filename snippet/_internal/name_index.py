@@ -0,0 +1,148 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Index of the example names found, for detecting duplicate names as the examples of each file are found.
+
+The index may be saved between runs, along with the signature of each file, so that partial runs can check the names
+of the files they parse against those of the files they do not.
+"""
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from snippet import exceptions
+from snippet.config import Config
+from snippet._internal.logs import LOGGER
+
+NAME_INDEX_FORMAT_VERSION = 1
+
+
+class NameIndex:
+    """Locations of the examples using each name, in the order these were added.
+
+    All the locations of a name are kept, so that every duplicate can be reported at once. The index is only saved
+    when `name_index_path` is set in the configuration.
+    """
+
+    def __init__(self, config: Config) -> None:
+        """Initialiser."""
+        # shards only see some of the files, their names are checked once the shards are merged
+        self._path = None if config.shard else config.name_index_path
+        self._fingerprint = ""
+        if self._path:
+            # the names found depend on the parsing options, as do cached results
+            from snippet._internal.cache import config_fingerprint
+
+            self._fingerprint = config_fingerprint(config)
+        self._files: Dict[str, dict] = dict()  # signature and examples of each file
+        self._locations: Dict[str, List[tuple]] = dict()  # keys of the examples using each name
+
+    @property
+    def enabled(self) -> bool:
+        """States whether the index is saved between runs."""
+        return bool(self._path)
+
+    def load(self) -> None:
+        """Loads the index from disk."""
+        if not self._path or not os.path.exists(self._path):
+            return
+        import json
+
+        try:
+            with open(self._path, encoding="utf8") as fh:
+                contents = json.load(fh)
+        except (OSError, ValueError) as e:
+            LOGGER.debug("ignoring unreadable name index %s: %s", self._path, e)
+            return
+        if contents.get("version") != NAME_INDEX_FORMAT_VERSION or contents.get("fingerprint") != self._fingerprint:
+            LOGGER.debug("ignoring outdated name index %s", self._path)
+            return
+        for path, entry in contents.get("files", dict()).items():
+            self._files[path] = dict(mtime_ns=entry["mtime_ns"], size=entry["size"], examples=list())
+            for line_num, example_name in entry["examples"]:
+                self.add((path, line_num, example_name))
+
+    def save(self) -> None:
+        """Saves the index to disk."""
+        if not self._path:
+            return
+        from snippet._internal.file_wrangler import replace_file
+        import json
+
+        contents = dict(version=NAME_INDEX_FORMAT_VERSION, fingerprint=self._fingerprint, files=self._files)
+        os.makedirs(os.path.dirname(os.path.abspath(self._path)), exist_ok=True)
+        replace_file(self._path, [json.dumps(contents)])
+
+    def add(self, key: tuple) -> None:
+        """Adds the location of an example."""
+        path, line_num, example_name = key
+        self._files.setdefault(path, dict(mtime_ns=None, size=None, examples=list()))
+        self._files[path]["examples"].append([line_num, example_name])
+        self._locations.setdefault(example_name, list()).append(key)
+
+    def add_file(self, path: str, keys: Iterable[tuple]) -> List[Tuple[tuple, tuple]]:
+        """Replaces the examples of a file, returning those using a name already used, along with its first use."""
+        self.remove_file(path)
+        signature = _signature(path) if self._path else (None, None)
+        self._files[path] = dict(mtime_ns=signature[0], size=signature[1], examples=list())
+        duplicates = list()
+        for key in keys:
+            self.add(key)
+            first = self._locations[key[2]][0]
+            if first != key:
+                duplicates.append((key, first))
+        return duplicates
+
+    def remove_file(self, path: str) -> None:
+        """Removes the examples of a file."""
+        entry = self._files.pop(path, None)
+        if not entry:
+            return
+        for _, example_name in entry["examples"]:
+            locations = [key for key in self._locations[example_name] if key[0] != path]
+            if locations:
+                self._locations[example_name] = locations
+            else:
+                del self._locations[example_name]
+
+    def retain(self, paths: Iterable[str]) -> None:
+        """Removes the examples of any file not listed."""
+        for path in set(self._files).difference(paths):
+            self.remove_file(path)
+
+    def is_current(self, path: str) -> bool:
+        """States whether the examples of a file are known, and the file is unchanged since."""
+        entry = self._files.get(path)
+        if not entry or entry["size"] is None:
+            return False
+        return _signature(path) == (entry["mtime_ns"], entry["size"])
+
+    def names(self, path: str) -> List[str]:
+        """Gets the names of the examples of a file."""
+        return [example_name for _, example_name in self._files.get(path, dict()).get("examples", list())]
+
+    def locations(self, example_name: str) -> List[tuple]:
+        """Gets the keys of the examples using a name."""
+        return list(self._locations.get(example_name, list()))
+
+    def duplicates(self) -> List[Tuple[tuple, tuple]]:
+        """Gets all the examples using a name already used, along with its first use."""
+        return [(key, keys[0]) for keys in self._locations.values() for key in keys[1:]]
+
+
+def duplicate_name(duplicates: Iterable[Tuple[tuple, tuple]]) -> exceptions.DuplicateName:
+    """Creates the error reporting examples using a name already used, listing each one on a line."""
+    return exceptions.DuplicateName(
+        "\n".join(
+            "Example with duplicate name %s %s matches %s" % (path, line_num, first)
+            for (path, line_num, _), first in duplicates
+        )
+    )
+
+
+def _signature(path: str) -> Tuple[Optional[int], Optional[int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None, None
+    return stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,117 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Splitting a run into shards, for instance across CI agents, and merging the results of the shards.
+
+Files are assigned to shards by a hash of their path relative to the project root, so that every agent agrees on the
+assignment whatever the location of its checkout. Each shard writes an artifact with the examples it found, and the
+artifacts of all the shards are merged once these are gathered.
+"""
+import glob
+import os
+import zlib
+from typing import Dict, List, Tuple
+
+from snippet import exceptions
+from snippet.config import Config
+from snippet._internal import file_wrangler
+from snippet._internal.cache import config_fingerprint
+from snippet._internal.util import relative_posix_path
+
+SHARD_FORMAT_VERSION = 1
+
+
+def parse_shard(shard: str) -> Tuple[int, int]:
+    """Parses a shard such as `2/5`, the second of five shards, returning its index (from 1) and the count."""
+    try:
+        index, count = (int(part) for part in shard.split("/"))
+    except ValueError:
+        raise ValueError(f"invalid shard {shard!r}, expected the index and count of shards such as '1/4'") from None
+    if not 1 <= index <= count:
+        raise ValueError(f"invalid shard {shard!r}, the index must be between 1 and the count of shards")
+    return index, count
+
+
+def select_paths(config: Config, paths: List[str], index: int, count: int) -> List[str]:
+    """Selects the paths of a shard."""
+    return [
+        path
+        for path in paths
+        if zlib.crc32(relative_posix_path(path, config.project_root).encode("utf8")) % count == index - 1
+    ]
+
+
+def shard_path(config: Config, index: int, count: int) -> str:
+    """Gets the path of the artifact of a shard."""
+    return os.path.join(config.shard_dir, f"shard-{index}-of-{count}.json")
+
+
+def find_shards(config: Config) -> List[str]:
+    """Finds the artifacts of the shards."""
+    return sorted(glob.glob(os.path.join(glob.escape(config.shard_dir), "shard-*-of-*.json")))
+
+
+def write_shard(
+    config: Config, index: int, count: int, examples: dict, line_ranges: Dict[tuple, Tuple[int, int]]
+) -> str:
+    """Writes the artifact of a shard, returning its path.
+
+    Paths are relative to the project root, so that the artifacts can be merged from another checkout.
+    """
+    import json
+
+    records = list()
+    for key, code_lines in examples.items():
+        path, line_num, example_name = key
+        _, end_line_num = line_ranges.get(key, (line_num, line_num))
+        relative_path = relative_posix_path(path, config.project_root)
+        records.append([relative_path, line_num, example_name, code_lines, end_line_num])
+    contents = dict(
+        version=SHARD_FORMAT_VERSION, fingerprint=config_fingerprint(config), index=index, count=count, examples=records
+    )
+    path = shard_path(config, index, count)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    file_wrangler.replace_file(path, [json.dumps(contents)])
+    return path
+
+
+def read_shards(config: Config, paths: List[str]) -> Tuple[dict, Dict[tuple, Tuple[int, int]]]:
+    """Reads and combines the artifacts of all the shards of a run, returning their examples and line ranges.
+
+    Examples are returned in the order of their paths, as found by a run which is not sharded.
+    """
+    import json
+
+    fingerprint = config_fingerprint(config)
+    records = list()
+    indices: Dict[int, str] = dict()
+    counts = set()
+    for path in paths:
+        with open(path, encoding="utf8") as fh:
+            contents = json.load(fh)
+        if contents.get("version") != SHARD_FORMAT_VERSION:
+            raise exceptions.ShardError(f"{path} was written by another version of snippet")
+        if contents["fingerprint"] != fingerprint:
+            raise exceptions.ShardError(f"{path} was written with other parsing options")
+        if contents["index"] in indices:
+            raise exceptions.ShardError(f"{path} and {indices[contents['index']]} are artifacts of the same shard")
+        indices[contents["index"]] = path
+        counts.add(contents["count"])
+        records.extend(contents["examples"])
+    if not counts:
+        raise exceptions.ShardError("no shard artifacts were found")
+    if len(counts) > 1:
+        raise exceptions.ShardError(f"artifacts of runs split into {sorted(counts)} shards were found, expected one")
+    count = counts.pop()
+    missing = sorted(set(range(1, count + 1)).difference(indices))
+    if missing:
+        raise exceptions.ShardError(f"the artifacts of shards {missing} of {count} are missing")
+
+    examples = dict()
+    line_ranges = dict()
+    for relative_path, line_num, example_name, code_lines, end_line_num in sorted(records, key=lambda r: r[:2]):
+        key = (os.path.abspath(os.path.join(config.project_root, relative_path)), line_num, example_name)
+        examples[key] = code_lines
+        line_ranges[key] = (line_num, end_line_num)
+    return examples, line_ranges
@@ -0,0 +1,70 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Mustache templates, parsed once and rendered many times."""
+import html
+import re
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple, Union
+
+# a variable tag, either escaped `{{name}}` or unescaped `{{{name}}}` / `{{&name}}`
+VARIABLE_TAG = re.compile(r"{{(?:{\s*(?P<triple>\w+)\s*}|&\s*(?P<ampersand>\w+)|\s*(?P<plain>\w+))\s*}}")
+
+
+class Template:
+    """A mustache template.
+
+    Templates made only of text and variable tags, such as the default ones, are rendered without pystache, which is
+    then not even imported.
+    """
+
+    def __init__(self, source: str) -> None:
+        """Initialiser."""
+        self._parts = _parse_simple_template(source)
+        self._parsed: Any = None
+        if self._parts is None:
+            import pystache
+
+            self._parsed = pystache.parse(source)
+
+    @property
+    def is_simple(self) -> bool:
+        """States whether the template is made only of text and variable tags."""
+        return self._parts is not None
+
+    def render(self, **context: str) -> str:
+        """Renders the template."""
+        if self._parts is None:
+            import pystache
+
+            return str(pystache.Renderer().render(self._parsed, context))
+        return "".join(part if isinstance(part, str) else _render_variable(part, context) for part in self._parts)
+
+
+@lru_cache(maxsize=32)
+def compile_template(source: str) -> Template:
+    """Gets the template for some template source, parsing it the first time."""
+    return Template(source)
+
+
+def _parse_simple_template(source: str) -> Optional[List[Union[str, Tuple[str, bool]]]]:
+    parts: List[Union[str, Tuple[str, bool]]] = list()
+    position = 0
+    for match in VARIABLE_TAG.finditer(source):
+        parts.append(source[position:match.start()])
+        escape = match.group("plain") is not None
+        parts.append((match.group("triple") or match.group("ampersand") or match.group("plain"), escape))
+        position = match.end()
+    parts.append(source[position:])
+    if any("{{" in part for part in parts if isinstance(part, str)):
+        # sections, comments, partials and so on are left to pystache
+        return None
+    return [part for part in parts if part]
+
+
+def _render_variable(tag: Tuple[str, bool], context: dict) -> str:
+    name, escape = tag
+    value = str(context.get(name, ""))
+    # same escaping as pystache's default
+    return html.escape(value, quote=True) if escape else value
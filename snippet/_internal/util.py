@@ -3,6 +3,8 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 """Utilities."""
+import os
+from pathlib import Path
 from typing import Any
 
 
@@ -11,3 +13,13 @@ def ensure_list(item: Any) -> list:
     if item:
         return item if isinstance(item, list) else [item]
     return list()
+
+
+def relative_posix_path(path: str, root: str) -> str:
+    """Gets a path relative to a directory, with forward slashes, or the path as is if it is on another drive."""
+    try:
+        path = os.path.relpath(path, os.path.abspath(root))
+    except ValueError:
+        # on another drive
+        pass
+    return Path(path).as_posix()
@@ -3,19 +3,137 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 """Code Snippet APIs."""
+import os
 import textwrap
+from functools import partial
+from typing import Any, Iterable, Iterator, List, Optional, Set
 
 from snippet import workflow, config
+from snippet._internal import file_wrangler
 from snippet._internal.logs import LOGGER
+from snippet.snippet import CodeSnippet
+from snippet.stats import Stats
 
 
-def extract_code_snippets(config: config.Config) -> None:
-    """Extracts code snippets according to configuration."""
+def extract_code_snippets(config: config.Config, stats: Optional[Stats] = None) -> Stats:
+    """Extracts code snippets according to configuration, returning the timings and counters of the run.
+
+    These are added to `stats` when given, e.g. to include the time taken to load the configuration.
+    """
+    LOGGER.debug("project directory is %r", config.project_root)
+    stats = stats or Stats()
+    examples, paths, failures = workflow.run(config, stats)
+
+    _report_failures(failures)
+    return stats
+
+
+def merge_code_snippets(
+    config: config.Config, artifact_paths: Optional[List[str]] = None, stats: Optional[Stats] = None
+) -> Stats:
+    """Merges the artifacts of a sharded run, writing the output files once, and returns the timings and counters.
+
+    The artifacts are those in `shard_dir` unless listed.
+    """
+    LOGGER.debug("project directory is %r", config.project_root)
+    stats = stats or Stats()
+    examples, failures = workflow.merge(config, artifact_paths, stats)
+
+    _report_failures(failures)
+    return stats
+
+
+def iter_code_snippets(config: config.Config) -> Iterator[CodeSnippet]:
+    """Extracts code snippets according to configuration, yielding those of each file as soon as it is parsed.
+
+    Nothing is written, so that snippets can be passed on to other writers or indexes without holding all of them
+    in memory. Failures are raised once all the files have been parsed.
+    """
     LOGGER.debug("project directory is %r", config.project_root)
-    examples, paths, failures = workflow.run(config)
+    failures: List[Any] = list()
+    for _, examples in workflow.iter_examples(config, failures):
+        for (path, line_num, example_name), code_lines in examples.items():
+            yield CodeSnippet(path, line_num, example_name, code_lines)
+
+    _report_failures(failures)
+
+
+def watch_code_snippets(config: config.Config) -> None:
+    """Extracts code snippets, then keeps them up to date as files change, until interrupted."""
+    LOGGER.debug("project directory is %r", config.project_root)
+    watcher = workflow.Watcher(config)
+    examples, paths, failures = watcher.start()
+
+    _report_failures(failures, fatal=False)
+    LOGGER.info("watching %s files for changes", len(paths))
+    watcher.watch(partial(_report_failures, fatal=False))
+
+
+class SnippetSession:
+    """Extracts code snippets repeatedly from a long-lived process, such as a documentation build server.
+
+    The configuration is resolved once, and the files found and the examples of each file are kept in memory
+    between extractions, along with the matcher and templates compiled for the configuration. Only the files which
+    changed since the previous extraction are parsed again, and only the output files of their examples are written
+    again.
+    """
+
+    def __init__(self, config: config.Config) -> None:
+        """Initialiser."""
+        # the file monitor module is slow to import, this only needs polling
+        from snippet._internal.monitor import PollingMonitor
+
+        self.config = config
+        self._watcher = workflow.Watcher(config)
+        self._monitor = PollingMonitor(interval=0)
+        self._started = False
+
+    @property
+    def paths(self) -> List[str]:
+        """Gets the paths of the files found by the previous extraction."""
+        return self._watcher.paths
+
+    def extract(self, changed_paths: Optional[Iterable[str]] = None) -> Stats:
+        """Extracts code snippets, returning the timings and counters of the extraction.
+
+        The first extraction processes all the files. The following ones only process the files which changed:
+        `changed_paths` when the caller knows which these are, otherwise the files whose modification time or size
+        changed, and files added or removed since.
+        """
+        stats = Stats()
+        if not self._started:
+            examples, paths, failures = self._watcher.start(stats)
+            self._monitor.track(paths)
+            self._started = True
+        else:
+            with stats.stage("find"):
+                changed = self._find_changes(changed_paths)
+            failures = self._watcher.update(sorted(changed), stats)
+            stats.files_found = len(self._watcher.paths)
+
+        _report_failures(failures)
+        return stats
+
+    def _find_changes(self, changed_paths: Optional[Iterable[str]]) -> Set[str]:
+        known = set(self._watcher.paths)
+        if changed_paths is None:
+            paths = set(file_wrangler.find_files(self.config))
+            changed = self._monitor.poll().intersection(paths)
+        else:
+            changed = {os.path.abspath(path) for path in changed_paths}
+            # only search for files again when new ones may match the input globs
+            paths = set(file_wrangler.find_files(self.config)) if changed.difference(known) else known
+            changed.intersection_update(paths.union(known))
+            # so that these are not reported as changed by the next extraction
+            self._monitor.poll(changed)
+        self._monitor.track(paths)
+        return changed.union(paths.symmetric_difference(known))
+
 
-    if failures:
-        LOGGER.error(
-            "failures:\n%s", textwrap.indent("\n".join(f"{name}: {exc}" for name, exc in failures), prefix="  ")
-        )
+def _report_failures(failures: List[Any], fatal: bool = True) -> None:
+    """Logs failures, raising an error once these are logged unless they are not `fatal`."""
+    if not failures:
+        return
+    LOGGER.error("failures:\n%s", textwrap.indent("\n".join(f"{name}: {exc}" for name, exc in failures), prefix="  "))
+    if fatal:
         raise Exception(f"There were {len(failures)} failures!")
@@ -7,12 +7,12 @@ import argparse
 
 import os
 import sys
-import dotenv
+from pathlib import Path
+from typing import Optional
 
 from mbed_tools_lib.logging import set_log_level, MbedToolsHandler
 
-from snippet import config
-from snippet.api import extract_code_snippets
+from snippet.stats import Stats
 from snippet._internal.logs import LOGGER
 
 
@@ -36,16 +36,92 @@ def main() -> int:
     parser.add_argument(
         "-t", "--traceback", action="store_true", default=True, help="Show a traceback when an error is raised."
     )
+    parser.add_argument(
+        "-j", "--jobs", type=int, help="number of processes parsing files in parallel, 0 for one per CPU [config]"
+    )
+    parser.add_argument(
+        "-w", "--watch", action="store_true", help="keep running, updating the output whenever input files change"
+    )
+    parser.add_argument(
+        "--since", metavar="REF", help="only write the examples of files changed since a git ref [config]"
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        help="only process the I-th of N shards of the files, writing an artifact for --merge [config]",
+    )
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="merge the artifacts of the shards of a run, checking for duplicate names and writing the output",
+    )
+    parser.add_argument(
+        "-a",
+        "--artifact",
+        action="append",
+        help="path to the artifact of a shard, with --merge [all those in shard_dir]",
+    )
+    parser.add_argument(
+        "--stats", action="store_true", help="print the time taken by each stage, and what was read and written"
+    )
     args = parser.parse_args()
-    set_log_level(args.verbose)
-    dotenv.load_dotenv(dotenv.find_dotenv(usecwd=True, raise_error_if_not_found=False))
+    if args.merge and (args.watch or args.since or args.shard):
+        parser.error("--merge cannot be used with --watch, --since or --shard")
+    if args.watch and (args.since or args.shard):
+        parser.error("--watch cannot be used with --since or --shard")
+    if args.artifact and not args.merge:
+        parser.error("--artifact can only be used with --merge")
+    _set_up(args)
+    # imported once the arguments are parsed, so that --help is quick
+    from snippet import config
+    from snippet.api import extract_code_snippets, merge_code_snippets, watch_code_snippets
+
+    # command line options which are not set do not override the config files
+    options = dict(project_root=args.dir, workers=args.jobs, since=args.since, shard=args.shard)
+    options = {k: v for k, v in options.items() if v is not None}
     # Use the context manager to ensure tools exceptions (expected behaviour) are shown as messages to the user,
     # but all other exceptions (unexpected behaviour) are shown as errors.
     with MbedToolsHandler(LOGGER, args.traceback):
-        extract_code_snippets(config.get_config(config_paths=args.config, project_root=args.dir))
+        stats = Stats()
+        with stats.stage("config"):
+            snippet_config = config.get_config(config_paths=args.config, **options)
+        if not args.watch:
+            try:
+                if args.merge:
+                    merge_code_snippets(snippet_config, args.artifact, stats)
+                else:
+                    extract_code_snippets(snippet_config, stats)
+            finally:
+                if args.stats:
+                    print(stats.report())
+            return 0
+        try:
+            watch_code_snippets(snippet_config)
+        except KeyboardInterrupt:
+            pass
         return 0
     return 1
 
 
+def _set_up(args: argparse.Namespace) -> None:
+    set_log_level(args.verbose)
+    dotenv_path = _find_dotenv()
+    if dotenv_path:
+        # python-dotenv is only imported when there is a file to load
+        import dotenv
+
+        dotenv.load_dotenv(dotenv_path)
+
+
+def _find_dotenv() -> Optional[str]:
+    """Finds a .env file in the working directory or its parents, as python-dotenv's `find_dotenv` does."""
+    directory = Path.cwd()
+    for candidate in [directory, *directory.parents]:
+        path = candidate.joinpath(".env")
+        if path.is_file():
+            return str(path)
+    return None
+
+
 if __name__ == "__main__":
     sys.exit(main())
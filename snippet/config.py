@@ -3,16 +3,16 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 """Definition of the configuration of snippet."""
+import copy
 import glob
 import logging
 import os
+import re
 from pathlib import Path
 
-import toml
-
 from snippet._internal.logs import LOGGER
 from snippet._internal.util import ensure_list
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 
 class EnvironmentVariables:
@@ -26,6 +26,11 @@ class EnvironmentVariables:
 
 DEFAULT_PROJECT_ROOT_PATH = "."
 
+# directories which are not searched for config files
+IGNORED_DIRECTORIES = {"node_modules", "__pycache__", "site-packages", "venv", "build", "dist", "target"}
+# a `[snippet]` or `[snippet.xyz]` table header, a `snippet.xyz = ...` dotted key or a `snippet = {...}` inline table
+SNIPPET_TABLE_PATTERN = re.compile(r"""^\s*(\[\s*["']?snippet["']?\s*[\].]|["']?snippet["']?\s*[.=])""", re.MULTILINE)
+
 
 class Config:
     """Definition of snippet's configuration."""
@@ -33,10 +38,17 @@ class Config:
     # IO
     project_root = DEFAULT_PROJECT_ROOT_PATH  # the project root used for relative IO paths (set by commandline)
     input_glob = ["tests/example/*.py"]
+    exclude_glob: List[str] = list()  # paths (or globs) of input files and directories to leave out
+    ignore_files: List[str] = list()  # names of .gitignore-style files listing input paths to leave out
+    encoding = "utf8"  # encoding of the input files
+    encodings: Dict[str, str] = dict()  # encodings of the input files matching these globs, instead of `encoding`
     output_append = True  # if the output file exists, append to it
     output_dir = "."
     output_file_name_template = "{{name}}.md"  # a mustache template for the output file name
+    output_skip_unchanged = False  # do not rewrite output files whose content would not change (unless appending)
     write_attempts = 3  # number of retries when writing output files
+    manifest_path: Optional[str] = None  # file listing all the examples found, for other tools (disabled if unset)
+    manifest_format = "json"  # "json" for a single document, or "ndjson" for one example per line
 
     # Language and style
     language_name = "python"
@@ -59,11 +71,52 @@ class Config:
     # Validation and formatting logic
     drop_lines: List[str] = list()  # drop lines containing these phrases
     replacements = {"self.": ""}  # straightforward replacements
+    drop_patterns: List[str] = list()  # drop lines matching these regular expressions
+    replacement_patterns: Dict[str, str] = dict()  # regular expression replacements (as re.sub), after the others
     fail_on_contains = ["assert"]  # fail if these strings are found in code blocks
     auto_dedent = True  # keep code left-aligned with the start flag
     fail_on_dedent = True  # fail if code is dedented before reaching the end flag
     stop_on_first_failure = False  # fail early
 
+    # Performance
+    workers = 1  # number of processes parsing files in parallel (0 for one per CPU)
+    io_concurrency = 1  # number of files read or written at the same time, overlapping slow I/O (e.g. network drives)
+
+    shard: Optional[str] = None  # "i/N" to only process the i-th of N shards of the files, writing a shard artifact
+    shard_dir = "snippet-shards"  # directory of the shard artifacts, merged by `snippet --merge`
+
+    # Caching
+    cache_path: Optional[str] = None  # file storing extraction results between runs (disabled if unset)
+    name_index_path: Optional[str] = None  # file storing the example names of each file, for partial runs (if set)
+
+    # Change detection
+    since: Optional[str] = None  # only extract and write the examples of files changed since this git ref
+
+    # Profiles
+    profiles: Dict[str, dict] = dict()  # options of each profile, overriding the others (e.g. for each language)
+
+
+# options affecting the result of parsing a file, any change to these invalidates cached results
+PARSING_OPTIONS = (
+    "start_flag",
+    "end_flag",
+    "cloak_flag",
+    "uncloak_flag",
+    "drop_lines",
+    "replacements",
+    "drop_patterns",
+    "replacement_patterns",
+    "fail_on_contains",
+    "auto_dedent",
+    "fail_on_dedent",
+    "encoding",
+    "encodings",
+)
+
+
+# files written by each profile are kept apart, unless set by the profile
+PROFILE_FILE_OPTIONS = ("cache_path", "name_index_path", "manifest_path")
+
 
 def get_config(config_paths: Optional[list] = None, **options: dict) -> Config:
     """Gets Snippet's configuration."""
@@ -83,8 +136,11 @@ def get_config(config_paths: Optional[list] = None, **options: dict) -> Config:
 
 def _load_configs(config_paths: list) -> dict:
     """Loads all the config files."""
-    new_options = {}
+    new_options: dict = {}
     for toml_file in _find_configs(glob_patterns=config_paths):
+        # toml is only imported when there is a config file to load
+        import toml
+
         LOGGER.debug("trying config from %s", toml_file)
         with open(toml_file, encoding="utf8") as f:
             try:
@@ -95,10 +151,37 @@ def _load_configs(config_paths: list) -> dict:
             snippet_config = config_file_contents.get("snippet")
             if snippet_config:
                 LOGGER.info("loading config from %s", toml_file)
+                # profiles of the same name, from several files, are combined
+                profiles = new_options.get("profiles", dict())
+                for name, profile in snippet_config.pop("profiles", dict()).items():
+                    profiles[name] = dict(profiles.get(name, dict()), **profile)
                 new_options.update(snippet_config)
+                if profiles:
+                    new_options["profiles"] = profiles
     return new_options
 
 
+def get_profiles(config: Config) -> Dict[str, Config]:
+    """Gets the configuration of each profile, the options of the profile overriding those of `config`.
+
+    The profile name is added to the paths of the cache, name index and manifest (e.g. `cache.python.json`) unless
+    these are set by the profile.
+    """
+    profiles = dict()
+    for name, options in config.profiles.items():
+        profile = copy.copy(config)
+        profile.profiles = dict()
+        for k, v in options.items():
+            setattr(profile, k, v)
+        for option in PROFILE_FILE_OPTIONS:
+            path = getattr(profile, option)
+            if path and option not in options:
+                root, extension = os.path.splitext(path)
+                setattr(profile, option, f"{root}.{name}{extension}")
+        profiles[name] = profile
+    return profiles
+
+
 def _find_configs(glob_patterns: list) -> list:
     """Finds all the different configuration files on the file system."""
     configs = []
@@ -120,5 +203,65 @@ def _determine_config_paths(config_paths: Optional[list], options: dict) -> list
     config_paths.extend(_config_paths_from_env())
     # fallback option - search the project directory
     if len(config_paths) == 0:
-        config_paths.append(str((project_root.joinpath("**", "*.toml"))))
+        config_paths.extend(glob.escape(path) for path in _discover_configs(str(project_root)))
     return config_paths
+
+
+def _discover_configs(project_root: str) -> list:
+    """Finds the config files with a snippet table, around the project directory.
+
+    The project directory is searched first, leaving out hidden directories and directories of dependencies and
+    build artefacts, then its parent directories up to the root of the repository.
+    """
+    return _search_project_for_configs(project_root) or _search_parents_for_configs(project_root)
+
+
+def _search_project_for_configs(project_root: str) -> list:
+    configs = []
+    for directory, subdirectories, files in os.walk(project_root):
+        # prune in place, so that os.walk does not descend into these
+        subdirectories[:] = sorted(
+            name
+            for name in subdirectories
+            if not _is_ignored_directory(name) and not os.path.exists(os.path.join(directory, name, "pyvenv.cfg"))
+        )
+        configs.extend(_configs_in(directory, files))
+    return configs
+
+
+def _search_parents_for_configs(project_root: str) -> list:
+    configs: List[str] = []
+    directory = Path(project_root)
+    # stop at the root of the repository
+    while not directory.joinpath(".git").exists() and directory.parent != directory:
+        directory = directory.parent
+        try:
+            files = os.listdir(directory)
+        except OSError:
+            break
+        # configs closer to the project directory take precedence
+        configs[:0] = _configs_in(str(directory), files)
+    return configs
+
+
+def _configs_in(directory: str, files: list) -> list:
+    configs = []
+    for name in sorted(files):
+        path = os.path.join(directory, name)
+        if name.endswith(".toml") and not name.startswith(".") and _may_contain_snippet_table(path):
+            configs.append(path)
+    return configs
+
+
+def _is_ignored_directory(name: str) -> bool:
+    return name.startswith(".") or name in IGNORED_DIRECTORIES
+
+
+def _may_contain_snippet_table(path: str) -> bool:
+    """Cheaply checks whether a toml file may define a snippet table, before parsing it fully."""
+    try:
+        with open(path, encoding="utf8") as fh:
+            return bool(SNIPPET_TABLE_PATTERN.search(fh.read()))
+    except (OSError, ValueError) as e:
+        LOGGER.debug("failed to read %s: %s", path, e)
+        return False
@@ -39,3 +39,15 @@ class CloakMismatch(TagMismatch):
     """Invalid cloaking in snippet."""
 
     pass
+
+
+class VersionControlError(SnippetError):
+    """Failed to get changes from version control."""
+
+    pass
+
+
+class ShardError(SnippetError):
+    """Invalid or incomplete shard artifacts."""
+
+    pass
@@ -3,14 +3,29 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 """Text snippet extractor."""
-from typing import List, Optional
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
 from snippet import exceptions
+from snippet._internal import matcher as matchers
 from snippet.config import Config
 
 
+class CodeSnippet(NamedTuple):
+    """A code snippet extracted from a file."""
+
+    path: str
+    line_num: int  # zero-based index of the line with the start flag
+    name: str
+    lines: List[str]
+
+
 class Example:
-    """An example."""
+    """An example.
+
+    Attributes are held in slots rather than a per-instance dictionary, as there may be a great number of examples.
+    """
+
+    __slots__ = ("_key", "_strip", "_text", "_cloaking", "_end_line_num")
 
     def __init__(self, path: str, line_num: int, example_name: str, line: str) -> None:
         """Initialiser."""
@@ -18,6 +33,7 @@ class Example:
         self._strip = len(line) - len(line.lstrip())
         self._text: List[str] = list()
         self._cloaking = False
+        self._end_line_num = line_num
 
     def add_line(self, line: str) -> None:
         """Adds a line."""
@@ -37,6 +53,10 @@ class Example:
             raise exceptions.CloakMismatch(f"Already uncloaked at {self.debug_id} ({line_num})")
         self._cloaking = False
 
+    def end(self, line_num: int) -> None:
+        """Ends the example."""
+        self._end_line_num = line_num
+
     @property
     def is_cloaking(self) -> bool:
         """States whether it's in cloaking mode."""
@@ -57,6 +77,11 @@ class Example:
         """Gets the example strip number."""
         return self._strip
 
+    @property
+    def line_range(self) -> Tuple[int, int]:
+        """Gets the (zero-based) numbers of the lines of the start and end flags."""
+        return self._key[1], self._end_line_num
+
     @property
     def key(self) -> tuple:
         """Gets the example key."""
@@ -71,6 +96,8 @@ class Example:
 class Examples:
     """All the examples in a file."""
 
+    __slots__ = ("_examples", "_current_example")
+
     def __init__(self) -> None:
         """Initialiser."""
         self._examples: List[Example] = list()
@@ -90,6 +117,7 @@ class Examples:
             raise exceptions.CloakMismatch(
                 f"End of example reached whilst still cloaked {self._current_example.debug_id} ({line_num})"
             )
+        self._current_example.end(line_num)
         if not self._current_example.is_empty:
             self._examples.append(self._current_example)
         self._current_example = None
@@ -116,6 +144,11 @@ class Examples:
         if self._current_example:
             self._current_example.add_line(line)
 
+    @property
+    def is_capturing(self) -> bool:
+        """States whether an example is being captured."""
+        return self._current_example is not None
+
     def validate_dedent(self, line: str, line_num: int) -> None:
         """Validates dedent."""
         if not self._current_example:
@@ -145,44 +178,91 @@ class Examples:
         return self._examples
 
 
-def extract_snippets_from_text(config: Config, lines: list, path: str) -> dict:
-    """Finds snippets in lines of text."""
+def extract_snippets_from_text(
+    config: Config, lines: Iterable[str], path: str, line_ranges: Optional[dict] = None
+) -> dict:
+    """Finds snippets in lines of text.
+
+    The lines may be read lazily, only the lines of the examples are kept.
+    The lines of the start and end flags of each example are added to `line_ranges`, when given.
+    """
+    examples = Examples()
+    line_index = _parse_lines(config, examples, enumerate(lines), path)
+    return _collect(examples, line_index, line_ranges)
+
+
+def extract_snippets_from_bytes(
+    config: Config, lines: Iterable[bytes], path: str, line_ranges: Optional[dict] = None, encoding: str = "utf8"
+) -> dict:
+    """Finds snippets in lines of raw bytes, in an encoding compatible with ASCII (such as utf8 or latin-1).
+
+    Markers are searched for in the raw bytes, and only the lines with a marker or within an example are decoded.
+    Otherwise, the same as `extract_snippets_from_text`.
+    """
     examples = Examples()
+    has_marker = matchers.get_matcher(config).any_marker(encoding).search
+    line_count = [0]
+
+    def decoded_lines() -> Iterator[Tuple[int, str]]:
+        for line_num, line in enumerate(lines):
+            line_count[0] = line_num
+            # lines outside of examples only matter when these have a marker
+            if examples.is_capturing or has_marker(line):
+                yield line_num, line.decode(encoding)
+
+    _parse_lines(config, examples, decoded_lines(), path)
+    return _collect(examples, line_count[0], line_ranges)
+
+
+def _parse_lines(config: Config, examples: Examples, lines: Iterable[Tuple[int, str]], path: str) -> int:
+    """Parses numbered lines, returning the number of the last one."""
+    matcher = matchers.get_matcher(config)
     line_index = 0
-    for line_num, line in enumerate(lines):
+    for line_num, line in lines:
         line_index = line_num
-        if config.start_flag in line:
+        marker = matcher.find_marker(line)
+        if marker == matchers.START:
             # start capturing code from the next line
             examples.set_current(
                 Example(path=path, line_num=line_num, example_name=line.rsplit(":")[-1].strip(), line=line), line_num
             )
             continue
 
-        if config.end_flag in line:
+        if marker == matchers.END:
             # stop capturing, and discard empty blocks
             examples.store_current(line_num)
             continue
 
-        if config.uncloak_flag in line:
+        if marker == matchers.UNCLOAK:
             examples.uncloak(line_num)
             continue
 
-        if config.cloak_flag in line:
+        if marker == matchers.CLOAK:
             examples.cloak(line_num)
             continue
 
+        # lines outside of examples are neither validated nor captured
+        if not examples.is_capturing:
+            continue
+
         # whilst capturing, append code lines to the current block
         if config.fail_on_dedent:
             examples.validate_dedent(line, line_num)
         clean_line = examples.clean_line(line)
-        if any(match in clean_line for match in config.drop_lines):
+        if matcher.should_drop(clean_line):
             continue
-        for r_before, r_after in config.replacements.items():
-            clean_line = clean_line.replace(r_before, r_after)
-        examples.validate_line(config.fail_on_contains, clean_line, line_num)
+        if matcher.needs_replacing(clean_line):
+            clean_line = matcher.replace(clean_line)
+        if matcher.has_trigger(clean_line):
+            examples.validate_line(config.fail_on_contains, clean_line, line_num)
 
         # add this line of code to the example block
         examples.add_line(clean_line)
+    return line_index
+
 
+def _collect(examples: Examples, line_index: int, line_ranges: Optional[dict]) -> dict:
     examples.end(line_index)
+    if line_ranges is not None:
+        line_ranges.update((example.key, example.line_range) for example in examples.all)
     return {example.key: example.text for example in examples.all}
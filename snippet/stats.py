@@ -0,0 +1,79 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Timings and counters of a run, for finding out where the time goes."""
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+
+class FileStats(NamedTuple):
+    """Counters of a single file."""
+
+    skipped: bool  # the file has no markers, so it was not parsed
+    bytes_read: int
+    lines_parsed: int
+    seconds: float
+
+
+class Stats:
+    """Timings and counters of a run.
+
+    Stages are timed with wall time, in the order they are run. Files are parsed in worker processes when
+    `workers` is set, so the time spent on each file may add up to more than the time of the parsing stage.
+    """
+
+    def __init__(self) -> None:
+        """Initialiser."""
+        self.stage_seconds: Dict[str, float] = dict()
+        self.file_seconds: Dict[str, float] = dict()
+        self.files_found = 0
+        self.files_skipped = 0
+        self.cache_hits = 0
+        self.bytes_read = 0
+        self.lines_parsed = 0
+        self.examples_found = 0
+        self.outputs_written = 0
+        self.outputs_unchanged = 0
+        self.bytes_written = 0
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Times a stage of the run, adding to any previous time of the same stage."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + time.perf_counter() - started
+
+    def add_file(self, path: str, file_stats: FileStats) -> None:
+        """Adds the counters of a file which was read."""
+        self.files_skipped += file_stats.skipped
+        self.bytes_read += file_stats.bytes_read
+        self.lines_parsed += file_stats.lines_parsed
+        self.file_seconds[path] = file_stats.seconds
+
+    def slowest_files(self, count: int = 5) -> List[Tuple[str, float]]:
+        """Gets the files which took the longest to read and parse, with their time in seconds."""
+        return sorted(self.file_seconds.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def report(self) -> str:
+        """Describes the timings and counters."""
+        lines = ["stages:"]
+        lines.extend(f"  {name}: {seconds * 1000:.1f}ms" for name, seconds in self.stage_seconds.items())
+        lines.extend(
+            [
+                f"files: {self.files_found} found, {self.files_skipped} without markers, "
+                f"{self.cache_hits} from the cache",
+                f"read: {self.bytes_read} bytes, {self.lines_parsed} lines parsed",
+                f"examples: {self.examples_found} found",
+                f"outputs: {self.outputs_written} written ({self.bytes_written} bytes), "
+                f"{self.outputs_unchanged} unchanged",
+            ]
+        )
+        slowest_files = self.slowest_files()
+        if slowest_files:
+            lines.append("slowest files:")
+            lines.extend(f"  {path}: {seconds * 1000:.1f}ms" for path, seconds in slowest_files)
+        return "\n".join(lines)
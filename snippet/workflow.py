@@ -3,47 +3,347 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 """Definition of the full workflow."""
+import math
+import os
 import textwrap
+import time
+from collections import deque
+from contextlib import closing
 from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Tuple, Any, List, Dict
+from typing import Tuple, Any, AnyStr, Callable, List, Dict, Collection, Iterable, Iterator, Optional, Pattern, Set
 
-from snippet import exceptions
-from snippet._internal import file_wrangler
+from snippet._internal import file_finder, file_wrangler
+from snippet._internal.cache import ExtractionCache, config_fingerprint
 from snippet._internal.logs import LOGGER
+from snippet._internal.name_index import NameIndex, duplicate_name
 from snippet._internal.util import ensure_list
 from snippet._internal.wrapper import wrap
-from snippet.config import Config
-from snippet.snippet import extract_snippets_from_text
+from snippet.config import Config, get_profiles
+from snippet.snippet import extract_snippets_from_bytes, extract_snippets_from_text
+from snippet.stats import FileStats, Stats
 
 
-def run(config: Config) -> Tuple[dict, list, list]:
-    """Retrieves all the code snippets according to configuration."""
+def run(config: Config, stats: Optional[Stats] = None) -> Tuple[dict, list, list]:
+    """Retrieves all the code snippets according to configuration.
+
+    With profiles, the files of all the profiles are found in a single traversal of the file system, then the
+    snippets of each profile are retrieved in turn. Timings and counters are added to `stats`, when given.
+    """
+    stats = stats or Stats()
+    if config.profiles:
+        return _run_profiles(config, stats)
+    return _run(config, stats)
+
+
+def _run(
+    config: Config, stats: Stats, paths: Optional[List[str]] = None, shared: Optional[dict] = None
+) -> Tuple[dict, list, list]:
     failures: List[Any] = list()
+    _set_config(config)
+    if config.shard and config.since:
+        raise ValueError("since cannot be used with shard, as sharded runs do not write output files")
+    changed = None
+    if config.since:
+        from snippet._internal import git
+
+        with stats.stage("git"):
+            changed = git.changed_files(config.project_root, config.since)
+    line_ranges: Dict[tuple, Tuple[int, int]] = dict()
+    names = NameIndex(config)
+    examples, paths = _find_all_code_examples(config, failures, stats, names, changed, line_ranges, paths, shared)
+
+    if config.shard:
+        # names are checked, and output files written, once the artifacts of all the shards are merged
+        from snippet._internal import shards
+
+        with stats.stage("shard"):
+            index, count = shards.parse_shard(config.shard)
+            write = partial(shards.write_shard, config, index, count, examples, line_ranges)
+            wrap(config, failures, shards.shard_path(config, index, count), write)
+        return examples, paths, failures
+
+    # all the names are checked, including those of unchanged files
+    with stats.stage("duplicates"):
+        _check_for_duplicates(names)
+    _write_outputs(config, _examples_to_write(config, examples, changed), failures, stats)
+    _write_manifest(config, examples, line_ranges, failures, stats)
+    return examples, paths, failures
+
+
+def _run_profiles(config: Config, stats: Stats) -> Tuple[dict, list, list]:
+    if config.shard:
+        raise ValueError("shard cannot be used with profiles, as the profiles would write the same artifacts")
+    profiles = get_profiles(config)
+    for profile in profiles.values():
+        _set_config(profile)
+    with stats.stage("find"):
+        paths_of_profiles = file_wrangler.find_files_for_each(list(profiles.values()))
 
+    # files of several profiles are only parsed once, by the first of these profiles with the same parsing options
+    shared: Dict[Tuple[str, str], Tuple[dict, dict]] = dict()
+    examples: Dict[tuple, list] = dict()
+    paths: Set[str] = set()
+    failures: List[Any] = list()
+    for (name, profile), profile_paths in zip(profiles.items(), paths_of_profiles):
+        LOGGER.info("profile %s: %s files", name, len(profile_paths))
+        profile_examples, _, profile_failures = _run(profile, stats, profile_paths, shared)
+        examples.update(profile_examples)
+        paths.update(profile_paths)
+        failures.extend(profile_failures)
+    return examples, sorted(paths), failures
+
+
+def merge(
+    config: Config, artifact_paths: Optional[List[str]] = None, stats: Optional[Stats] = None
+) -> Tuple[dict, list]:
+    """Merges the artifacts of all the shards of a run, then checks for duplicate names and writes the output files.
+
+    The artifacts are found in `shard_dir`, unless listed. Timings and counters are added to `stats`, when given.
+    """
+    from snippet._internal import shards
+
+    failures: List[Any] = list()
+    stats = stats or Stats()
     _set_config(config)
-    examples, paths = _find_all_code_examples(config, failures)
+    with stats.stage("merge"):
+        examples, line_ranges = shards.read_shards(config, artifact_paths or shards.find_shards(config))
+    stats.examples_found += len(examples)
+
+    names = NameIndex(config)
+    with stats.stage("duplicates"):
+        for key in examples:
+            names.add(key)
+        _check_for_duplicates(names)
+    _write_outputs(config, examples, failures, stats)
+    _write_manifest(config, examples, line_ranges, failures, stats)
+    return examples, failures
+
 
-    _check_for_duplicates(examples)
+def iter_examples(config: Config, failures: List[Any]) -> Iterator[Tuple[str, dict]]:
+    """Retrieves the code snippets of each file according to configuration, as soon as the file is parsed.
 
+    Nothing is written. Failures are collected in `failures`, whilst duplicate names are raised when found.
+    """
+    if config.profiles:
+        raise ValueError("profiles are only supported by runs which write output files")
+    _set_config(config)
+    paths = file_wrangler.find_files(config)
+    cache = ExtractionCache(config)
+    cache.load()
+    names = NameIndex(config)
+    for path, new_examples in _extract_from_files(config, cache, paths, failures, Stats()):
+        _add_names(names, path, new_examples, fail_fast=True)
+        yield path, new_examples
+    # the cache is only saved once all the files were seen, as entries which are not seen are dropped
+    cache.save()
+
+
+class Watcher:
+    """Keeps the output of a project up to date as its files change.
+
+    The examples found in each file are kept in memory, so that only the files which change are parsed again,
+    and only the output files of their examples are written again.
+    """
+
+    # seconds between checks for changes when polling, and between searches for new files
+    poll_interval = 0.1
+    search_interval = 5.0
+
+    def __init__(self, config: Config) -> None:
+        """Initialiser."""
+        if config.profiles:
+            raise ValueError("profiles are not supported when watching for changes")
+        if config.shard or config.since:
+            raise ValueError("shard and since cannot be used when watching for changes, as every change is written")
+        self._config = config
+        self._files: Dict[str, dict] = dict()  # examples of each file, in the order files were found
+        self._names = NameIndex(config)  # locations of the examples using each name
+        self._output_files: Dict[tuple, str] = dict()  # output file of each example
+        self._input_globs: List[Pattern] = list()
+
+    @property
+    def paths(self) -> List[str]:
+        """Gets the paths of the files being watched."""
+        return list(self._files)
+
+    def start(self, stats: Optional[Stats] = None) -> Tuple[dict, list, list]:
+        """Runs the whole workflow, remembering the examples found."""
+        examples, paths, failures = run(self._config, stats)
+        # the input globs are absolute once the workflow has run
+        self._input_globs = [file_finder.compile_glob(pattern) for pattern in ensure_list(self._config.input_glob)]
+        self._files = {path: dict() for path in paths}
+        for key, code_lines in examples.items():
+            self._add_example(key, code_lines)
+        return examples, paths, failures
+
+    def update(self, paths: Iterable[str], stats: Optional[Stats] = None) -> list:
+        """Parses changed files again, and writes the output files of the examples they had or now have.
+
+        Timings and counters are added to `stats`, when given.
+        """
+        failures: List[Any] = list()
+        stats = stats or Stats()
+        affected_output_files: Set[str] = set()
+        with stats.stage("parse"):
+            for path in paths:
+                for key in self._files.get(path, dict()):
+                    affected_output_files.add(self._output_files.pop(key))
+                self._names.remove_file(path)
+                if not os.path.exists(path):
+                    LOGGER.info("%s was removed", path)
+                    self._files.pop(path, None)
+                    continue
+                LOGGER.info("%s changed", path)
+                new_examples, _, file_failures, file_stats = _parse_file(self._config, path)
+                failures.extend(file_failures)
+                stats.add_file(path, file_stats)
+                stats.examples_found += len(new_examples)
+                self._files[path] = dict()
+                for key, code_lines in new_examples.items():
+                    wrap(self._config, failures, path, partial(self._add_example, key, code_lines))
+                    if key in self._output_files:
+                        affected_output_files.add(self._output_files[key])
+
+        # output files are written again from all the examples going to them
+        examples = {
+            key: code_lines
+            for file_examples in self._files.values()
+            for key, code_lines in file_examples.items()
+            if self._output_files[key] in affected_output_files
+        }
+        writer = file_wrangler.OutputWriter(self._config, overwrite=True)
+        with stats.stage("write"):
+            _write_examples(self._config, examples, writer, failures)
+            for output_file in affected_output_files.difference(writer.output_files):
+                LOGGER.info("removing %s, no examples are written to it anymore", output_file)
+                wrap(self._config, failures, output_file, partial(_remove_file, output_file))
+        stats.outputs_written += writer.files_written
+        stats.outputs_unchanged += writer.files_unchanged
+        stats.bytes_written += writer.bytes_written
+        return failures
+
+    def watch(self, report_failures: Callable[[List[Any]], None]) -> None:
+        """Watches files for changes, updating the output until interrupted.
+
+        The failures of each update are passed to `report_failures`.
+        """
+        from snippet._internal.monitor import create_monitor
+
+        monitor = create_monitor(self.poll_interval)
+        monitor.track(self._files)
+        last_search = time.monotonic()
+        try:
+            while True:
+                changed = monitor.wait(self.search_interval)
+                paths = set(self._files)
+                unknown = changed.difference(paths, self._output_files.values())
+                # other files (e.g. swap files of editors) are left to the periodic search
+                new_inputs = any(self.is_input(path) for path in unknown)
+                if new_inputs or time.monotonic() - last_search > self.search_interval:
+                    # files may have been added or removed
+                    paths = set(file_wrangler.find_files(self._config))
+                    changed.update(paths.symmetric_difference(self._files))
+                    monitor.track(paths)
+                    last_search = time.monotonic()
+                changed.intersection_update(paths.union(self._files))
+                if changed:
+                    started = time.monotonic()
+                    try:
+                        failures = self.update(sorted(changed))
+                    except Exception:
+                        LOGGER.exception("failed to update %s", ", ".join(sorted(changed)))
+                        continue
+                    LOGGER.info("updated in %.0fms", (time.monotonic() - started) * 1000)
+                    report_failures(failures)
+        finally:
+            monitor.close()
+
+    def is_input(self, path: str) -> bool:
+        """States whether a path matches any of the input globs, so that it may be a new input file."""
+        posix_path = Path(path).as_posix()
+        return any(regex.fullmatch(posix_path) for regex in self._input_globs)
+
+    def _add_example(self, key: tuple, code_lines: list) -> None:
+        path, _, example_name = key
+        existing = self._names.locations(example_name)
+        if existing:
+            raise duplicate_name([(key, existing[0])])
+        self._names.add(key)
+        self._files[path][key] = code_lines
+        self._output_files[key] = file_wrangler.output_path(self._config, example_name)
+
+
+def _write_examples(config: Config, examples: dict, writer: file_wrangler.OutputWriter, failures: List[Any]) -> None:
     for (path, line_num, example_name), code_lines in examples.items():
         example_block = "\n".join(code_lines)
         LOGGER.info("example: %r", example_name)
         LOGGER.debug("example code: %s", example_block)
 
-        wrap(config, failures, path, partial(file_wrangler.write_example, config, example_name, example_block))
+        wrap(config, failures, path, partial(writer.add, example_name, example_block))
 
-    return examples, paths, failures
+    # examples sharing an output file are written together
+    output_files = writer.output_files
+    if config.io_concurrency > 1 and len(output_files) > 1:
+        from concurrent.futures import ThreadPoolExecutor
 
+        with ThreadPoolExecutor(max_workers=config.io_concurrency) as executor:
+            futures = [executor.submit(writer.write, output_file) for output_file in output_files]
+            try:
+                # failures are collected in the same order as when writing one file at a time
+                for output_file, future in zip(output_files, futures):
+                    wrap(config, failures, output_file, future.result)
+            finally:
+                for future in futures:
+                    future.cancel()
+    else:
+        for output_file in output_files:
+            wrap(config, failures, output_file, partial(writer.write, output_file))
+    LOGGER.info(
+        "wrote %s bytes to %s files, %s files unchanged",
+        writer.bytes_written,
+        writer.files_written,
+        writer.files_unchanged,
+    )
+
+
+def _write_outputs(config: Config, examples: dict, failures: List[Any], stats: Stats) -> None:
+    writer = file_wrangler.OutputWriter(config)
+    with stats.stage("write"):
+        _write_examples(config, examples, writer, failures)
+    stats.outputs_written += writer.files_written
+    stats.outputs_unchanged += writer.files_unchanged
+    stats.bytes_written += writer.bytes_written
+
+
+def _write_manifest(config: Config, examples: dict, line_ranges: dict, failures: List[Any], stats: Stats) -> None:
+    if not config.manifest_path:
+        return
+    from snippet._internal import manifest
+
+    with stats.stage("manifest"):
+        write = partial(manifest.write_manifest, config, examples, line_ranges)
+        wrap(config, failures, config.manifest_path, write)
+
+
+def _remove_file(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _check_for_duplicates(names: NameIndex) -> None:
+    # every duplicate is reported at once
+    duplicates = names.duplicates()
+    if duplicates:
+        raise duplicate_name(duplicates)
 
-def _check_for_duplicates(examples: dict) -> None:
-    unique_example_names: Dict[str, Any] = dict()
-    for (path, line_num, example_name), code_lines in examples.items():
-        existing = unique_example_names.get(example_name)
-        if existing:
-            raise exceptions.DuplicateName("Example with duplicate name %s %s matches %s" % (path, line_num, existing))
-        else:
-            unique_example_names[example_name] = (path, line_num, example_name)
+
+def _add_names(names: NameIndex, path: str, examples: dict, fail_fast: bool) -> None:
+    duplicates = names.add_file(path, examples)
+    if duplicates and fail_fast:
+        # the remaining files are not parsed
+        raise duplicate_name(duplicates)
 
 
 def _set_config(config: Config) -> None:
@@ -51,21 +351,240 @@ def _set_config(config: Config) -> None:
     config.input_glob = [
         str(Path(config.project_root).joinpath(str(pattern)).absolute()) for pattern in ensure_list(config.input_glob)
     ]
+    config.exclude_glob = [
+        str(Path(config.project_root).joinpath(str(pattern)).absolute()) for pattern in ensure_list(config.exclude_glob)
+    ]
     config.output_dir = str(Path(config.project_root).joinpath(config.output_dir).absolute())
+    if config.cache_path:
+        config.cache_path = str(Path(config.project_root).joinpath(config.cache_path).absolute())
+    if config.manifest_path:
+        config.manifest_path = str(Path(config.project_root).joinpath(config.manifest_path).absolute())
+    config.shard_dir = str(Path(config.project_root).joinpath(config.shard_dir).absolute())
 
 
-def _find_all_code_examples(config: Config, failures: List[Any]) -> Tuple[dict, list]:
-    paths = file_wrangler.find_files(config)
+def _examples_to_write(config: Config, examples: dict, changed: Optional[Set[str]]) -> dict:
+    if changed is None:
+        return examples
+    # output files are written again from all the examples going to them, if any of these comes from a changed file
+    output_files = {key: file_wrangler.output_path(config, key[2]) for key in examples}
+    affected_output_files = {output_files[key] for key in examples if os.path.realpath(key[0]) in changed}
+    return {key: code_lines for key, code_lines in examples.items() if output_files[key] in affected_output_files}
+
+
+def _find_all_code_examples(
+    config: Config,
+    failures: List[Any],
+    stats: Stats,
+    names: NameIndex,
+    changed: Optional[Set[str]] = None,
+    line_ranges: Optional[dict] = None,
+    paths: Optional[List[str]] = None,
+    shared: Optional[dict] = None,
+) -> Tuple[dict, list]:
+    # the files may have been found already, e.g. along with those of other profiles
+    with stats.stage("find"):
+        if paths is None:
+            paths = file_wrangler.find_files(config)
+        if config.shard:
+            from snippet._internal import shards
+
+            paths = shards.select_paths(config, paths, *shards.parse_shard(config.shard))
     LOGGER.debug("files to parse:\n%s", textwrap.indent("\n".join(paths), prefix="  "))
-    examples = dict()
+    stats.files_found += len(paths)
+    cache = ExtractionCache(config)
+    with stats.stage("cache"):
+        cache.load()
+        names.load()
+        # the names of files which changed since are stale, these files are parsed again
+        names.retain([path for path in paths if names.is_current(path)])
+    refresh: Set[str] = set()
+    unparsed: Set[str] = set()
+    if changed is not None:
+        refresh = {path for path in paths if os.path.realpath(path) in changed}
+        LOGGER.info("%s of %s files changed since %s", len(refresh), len(paths), config.since)
+        if not cache.enabled and not config.manifest_path:
+            # the names of unchanged files are checked against the index, rather than parsing these files
+            unparsed = {path for path in paths if path not in refresh and names.is_current(path)}
+        if not cache.enabled and len(unparsed) < len(paths) - len(refresh):
+            LOGGER.info("cache_path is not set, unchanged files are parsed too to check for duplicate names")
+
+    examples_by_path: Dict[str, dict] = dict()
+    extract = partial(
+        _extract_from_files, config, cache, failures=failures, stats=stats, line_ranges=line_ranges, shared=shared
+    )
+    with stats.stage("parse"):
+        for path, new_examples in extract([path for path in paths if path not in unparsed], refresh=refresh):
+            _add_names(names, path, new_examples, config.stop_on_first_failure)
+            examples_by_path[path] = new_examples
+        # unchanged files are still parsed if their examples go to the same output files as those of changed files
+        sharing_paths = _files_sharing_output_files(config, names, examples_by_path, refresh, unparsed)
+        for path, new_examples in extract(sharing_paths):
+            _add_names(names, path, new_examples, config.stop_on_first_failure)
+            examples_by_path[path] = new_examples
+        # store the new examples for analysis, in the order files were found
+        examples = {key: code_lines for path in paths for key, code_lines in examples_by_path.get(path, {}).items()}
+        stats.examples_found += len(examples)
+
+    LOGGER.info("found %s files, skipped %s files without markers", len(paths), stats.files_skipped)
+    if cache.enabled or names.enabled:
+        with stats.stage("cache"):
+            cache.save()
+            names.save()
+    if cache.enabled:
+        LOGGER.info("cache: %s hits, %s misses", cache.hits, cache.misses)
+    return examples, paths
+
 
+def _files_sharing_output_files(
+    config: Config, names: NameIndex, examples_by_path: Dict[str, dict], refresh: Set[str], unparsed: Set[str]
+) -> List[str]:
+    if not unparsed:
+        return list()
+    affected_output_files = {
+        file_wrangler.output_path(config, example_name)
+        for path in refresh
+        for _, _, example_name in examples_by_path.get(path, {})
+    }
+    return [
+        path
+        for path in sorted(unparsed)
+        if any(file_wrangler.output_path(config, name) in affected_output_files for name in names.names(path))
+    ]
+
+
+def _extract_from_files(
+    config: Config,
+    cache: ExtractionCache,
+    paths: list,
+    failures: List[Any],
+    stats: Stats,
+    refresh: Collection[str] = (),
+    line_ranges: Optional[dict] = None,
+    shared: Optional[dict] = None,
+) -> Iterator[Tuple[str, dict]]:
+    # only the files which changed since the last run get parsed, results are yielded in the order of `paths`
+    # files to `refresh` are parsed regardless of the cache
+    # the line ranges of the examples are added to `line_ranges`, when given
+    # results are taken from, and added to, `shared` when given, keyed by parsing options and path
+    fingerprint = config_fingerprint(config) if shared is not None else ""
+    cached: Dict[str, Optional[Tuple[dict, dict]]] = dict()
+    for path in paths:
+        if shared is not None and (fingerprint, path) in shared:
+            cached[path] = shared[(fingerprint, path)]
+        elif path in refresh:
+            wrap(config, failures, path, partial(cache.get, path, refresh=True))
+            cached[path] = None
+        else:
+            cached[path] = wrap(config, failures, path, partial(cache.get, path), ({}, {}))
+            stats.cache_hits += cached[path] is not None
+    parsed = _parse_files(config, [path for path in paths if cached[path] is None])
     for path in paths:
-        # load the file
-        lines = wrap(config, failures, path, partial(file_wrangler.load_file_lines, path), [])
+        result = cached[path]
+        if result is None:
+            new_examples, new_line_ranges, file_failures, file_stats = next(parsed)
+            failures.extend(file_failures)
+            stats.add_file(path, file_stats)
+            if not file_failures:
+                wrap(config, failures, path, partial(cache.put, path, new_examples, new_line_ranges))
+        else:
+            new_examples, new_line_ranges = result
+        if shared is not None:
+            shared[(fingerprint, path)] = (new_examples, new_line_ranges)
+        if line_ranges is not None:
+            line_ranges.update(new_line_ranges)
+        yield path, new_examples
 
-        # extract snippets
-        new_examples = wrap(config, failures, path, partial(extract_snippets_from_text, config, lines, path), {})
 
-        # store the new examples for analysis
-        examples.update(new_examples)
-    return examples, paths
+def _parse_files(config: Config, paths: list) -> Iterator[Tuple[dict, dict, list, FileStats]]:
+    workers = min(config.workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1 and config.io_concurrency > 1 and len(paths) > 1:
+        yield from _parse_files_in_threads(config, paths)
+        return
+    if workers <= 1:
+        for path in paths:
+            yield _parse_file(config, path)
+        return
+
+    # a few chunks per worker, balancing the load against the cost of sending tasks to the pool
+    number_of_chunks = min(workers * 4, len(paths))
+    remaining_paths = iter(paths)
+    chunks = [list(islice(remaining_paths, math.ceil(len(paths) / number_of_chunks))) for _ in range(number_of_chunks)]
+    # multiprocessing is slow to import, and only needed with several workers
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_parse_chunk, config, chunk) for chunk in chunks]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # do not parse the remaining files if stopping early
+            for future in futures:
+                future.cancel()
+
+
+def _parse_files_in_threads(config: Config, paths: list) -> Iterator[Tuple[dict, dict, list, FileStats]]:
+    # files are read ahead in threads, which wait on I/O concurrently whilst the results are yielded in order
+    # a bounded number of files are read ahead, so that few results are held in memory
+    from concurrent.futures import ThreadPoolExecutor
+
+    remaining_paths = iter(paths)
+    with ThreadPoolExecutor(max_workers=config.io_concurrency) as executor:
+        pending = deque(
+            executor.submit(_parse_file, config, path) for path in islice(remaining_paths, config.io_concurrency * 2)
+        )
+        try:
+            while pending:
+                result = pending.popleft().result()
+                for path in islice(remaining_paths, 1):
+                    pending.append(executor.submit(_parse_file, config, path))
+                yield result
+        finally:
+            # do not read the remaining files if stopping early
+            for future in pending:
+                future.cancel()
+
+
+def _parse_chunk(config: Config, paths: list) -> List[Tuple[dict, dict, list, FileStats]]:
+    return [_parse_file(config, path) for path in paths]
+
+
+def _parse_file(config: Config, path: str) -> Tuple[dict, dict, list, FileStats]:
+    # examples, their line ranges, failures and counters are collected per file, so that they can be reported by
+    # the parent process
+    started = time.perf_counter()
+    file_failures: List[Any] = list()
+    line_ranges: Dict[tuple, Tuple[int, int]] = dict()
+    size = _file_size(path)
+    encoding = file_wrangler.get_encoding(config, path)
+    # most files have no examples at all, these are skipped without decoding them, as are binary files
+    if not wrap(config, file_failures, path, partial(file_wrangler.has_markers, config, path, encoding), True):
+        return {}, line_ranges, file_failures, FileStats(True, size, 0, time.perf_counter() - started)
+    # the file is streamed through the parser, rather than loaded into memory
+    line_count = [0]
+    if file_wrangler.is_ascii_compatible(encoding):
+        # markers are found in the raw bytes, only the lines of the examples are decoded
+        with closing(file_wrangler.iter_file_bytes(path)) as raw_lines:
+            extract = partial(
+                extract_snippets_from_bytes, config, _count_lines(raw_lines, line_count), path, line_ranges, encoding
+            )
+            new_examples = wrap(config, file_failures, path, extract, {})
+    else:
+        with closing(file_wrangler.iter_file_lines(path, encoding)) as lines:
+            extract = partial(extract_snippets_from_text, config, _count_lines(lines, line_count), path, line_ranges)
+            new_examples = wrap(config, file_failures, path, extract, {})
+    file_stats = FileStats(False, size, line_count[0], time.perf_counter() - started)
+    return new_examples, line_ranges, file_failures, file_stats
+
+
+def _count_lines(lines: Iterable[AnyStr], line_count: List[int]) -> Iterator[AnyStr]:
+    for line in lines:
+        line_count[0] += 1
+        yield line
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
@@ -2,8 +2,53 @@
 # Copyright (C) 2020 Arm Mbed. All rights reserved.
 # SPDX-License-Identifier: Apache-2.0
 #
+import os
+import tempfile
 from pathlib import Path
 
+from snippet.config import Config
+
 tmp_test_dirname = "tmp_test_dir"
 tmp_test_dir = Path(__file__).parent.joinpath(tmp_test_dirname).absolute()
 sample_input_dir = Path(__file__).parent.joinpath("samples").absolute()
+
+
+class SampleProject:
+    """Mixin for test cases on a temporary project, with input files written by the tests."""
+
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+        self.modified = 0
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        super().tearDown()
+
+    def write(self, name, *example_names):
+        """Writes an input file with an example of each name, returning its path."""
+        from tests import test_parser as P
+
+        text = "".join(["blah blah\n", P.start, "{}", P.newline, P.A, P.B, P.C, P.stop, "# rhubarb\n"])
+        path = str(Path(self.root).joinpath(name))
+        with open(path, "w", encoding="utf8") as fh:
+            fh.write("".join(text.format(example_name) for example_name in example_names))
+        # a later modification time, so that the change is noticed even on file systems with a coarse resolution
+        self.modified += 1
+        os.utime(path, (self.modified, self.modified))
+        return path
+
+    def make_config(self, **options):
+        """Creates a configuration for the input files of the project."""
+        config = Config()
+        config.project_root = self.root
+        config.input_glob = "*.txt"
+        config.output_dir = "output"
+        for name, value in options.items():
+            setattr(config, name, value)
+        return config
+
+    def outputs(self):
+        """Gets the names of the output files."""
+        return sorted(path.name for path in Path(self.root).joinpath("output").iterdir())
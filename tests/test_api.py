@@ -0,0 +1,104 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import os
+import unittest
+from pathlib import Path
+
+from snippet import api, exceptions
+from snippet.snippet import CodeSnippet
+from tests import SampleProject
+from tests import test_parser as P
+
+
+class TestIterCodeSnippets(SampleProject, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.config = self.make_config()
+
+    def test_yields_snippets(self):
+        first = self.write("a.txt", "snippet 1", "snippet 2")
+        second = self.write("b.txt", "snippet 3")
+        snippets = list(api.iter_code_snippets(self.config))
+        self.assertEqual(
+            [(s.path, s.name) for s in snippets], [(first, "snippet 1"), (first, "snippet 2"), (second, "snippet 3")]
+        )
+        self.assertEqual(snippets[0], CodeSnippet(first, 1, "snippet 1", P.sample_output.split("\n")))
+        # nothing is written
+        self.assertFalse(os.path.exists(Path(self.root).joinpath("output")))
+
+    def test_lazy(self):
+        self.write("a.txt", "snippet 1")
+        self.write("b.txt", "snippet 2")
+        snippets = api.iter_code_snippets(self.config)
+        self.assertEqual(next(snippets).name, "snippet 1")
+        # the second file is only parsed when needed
+        self.write("b.txt", "snippet 3")
+        self.assertEqual(next(snippets).name, "snippet 3")
+
+    def test_duplicates(self):
+        self.write("a.txt", "snippet 1")
+        self.write("b.txt", "snippet 1")
+        snippets = api.iter_code_snippets(self.config)
+        next(snippets)
+        with self.assertRaises(exceptions.DuplicateName):
+            next(snippets)
+
+    def test_failures_raised_at_the_end(self):
+        self.write("a.txt", "snippet 1")
+        with open(Path(self.root).joinpath("b.txt"), "w", encoding="utf8") as fh:
+            fh.write(P.start + "broken" + P.newline)
+        snippets = api.iter_code_snippets(self.config)
+        self.assertEqual(next(snippets).name, "snippet 1")
+        with self.assertRaises(Exception):
+            next(snippets)
+
+
+class TestSnippetSession(SampleProject, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.paths = [self.write(f"sample{i}.txt", f"snippet {i}") for i in range(3)]
+        self.session = api.SnippetSession(self.make_config(output_template="{{{code}}}\n"))
+
+    def test_first_extraction(self):
+        stats = self.session.extract()
+        self.assertEqual((stats.files_found, stats.examples_found, stats.outputs_written), (3, 3, 3))
+        self.assertEqual(self.session.paths, self.paths)
+
+    def test_nothing_changed(self):
+        self.session.extract()
+        stats = self.session.extract()
+        self.assertEqual((stats.files_found, stats.lines_parsed, stats.outputs_written), (3, 0, 0))
+
+    def test_detects_changes(self):
+        self.session.extract()
+        self.write("sample1.txt", "snippet 1", "snippet 3")
+        os.remove(self.paths[2])
+        new_path = self.write("sample4.txt", "snippet 4")
+
+        stats = self.session.extract()
+        self.assertEqual(stats.file_seconds.keys(), {self.paths[1], new_path})
+        self.assertEqual(self.outputs(), ["snippet_0.md", "snippet_1.md", "snippet_3.md", "snippet_4.md"])
+        self.assertEqual(self.session.paths, [self.paths[0], self.paths[1], new_path])
+
+    def test_changed_paths(self):
+        self.session.extract()
+        self.write("sample0.txt", "snippet 5")
+        self.write("sample1.txt", "snippet 6")
+        new_path = self.write("sample4.txt", "snippet 4")
+
+        # only the files given are processed
+        stats = self.session.extract([self.paths[1], new_path])
+        self.assertEqual(stats.file_seconds.keys(), {self.paths[1], new_path})
+        self.assertEqual(self.outputs(), ["snippet_0.md", "snippet_2.md", "snippet_4.md", "snippet_6.md"])
+
+        # and are not processed again
+        stats = self.session.extract()
+        self.assertEqual(list(stats.file_seconds), [self.paths[0]])
+
+    def test_duplicates(self):
+        self.session.extract()
+        self.write("sample1.txt", "snippet 0")
+        with self.assertRaises(Exception):
+            self.session.extract()
@@ -0,0 +1,108 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from snippet import workflow
+from snippet._internal.cache import ExtractionCache
+from snippet.config import Config
+from snippet.stats import Stats
+from tests import test_parser as P
+
+
+class Test(unittest.TestCase):
+    text = "".join(["blah blah\n", P.start, "this snippet", P.newline, P.A, P.B, P.C, P.stop])
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.paths = [str(Path(self.tmpdir.name).joinpath(f"sample{i}.txt")) for i in range(2)]
+        for i, path in enumerate(self.paths):
+            with open(path, "w", encoding="utf8") as fh:
+                fh.write(self.text.replace("this snippet", f"snippet {i}"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_config(self):
+        config = Config()
+        config.stop_on_first_failure = True
+        config.project_root = self.tmpdir.name
+        config.input_glob = "*.txt"
+        config.output_dir = "out"
+        config.cache_path = "cache.json"
+        return config
+
+    def run_cached(self, config=None):
+        config = config or self.make_config()
+        workflow._set_config(config)
+        cache = ExtractionCache(config)
+        cache.load()
+        examples = dict()
+        for path, new_examples in workflow._extract_from_files(config, cache, self.paths, [], Stats()):
+            examples.update(new_examples)
+        cache.save()
+        return examples, cache
+
+    def test_hits_after_first_run(self):
+        first_examples, cache = self.run_cached()
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+        examples, cache = self.run_cached()
+        self.assertEqual((cache.hits, cache.misses), (2, 0))
+        self.assertEqual(first_examples, examples)
+
+    def test_modified_file_is_reparsed(self):
+        self.run_cached()
+        with open(self.paths[0], "a", encoding="utf8") as fh:
+            fh.write(self.text.replace("this snippet", "another snippet"))
+
+        examples, cache = self.run_cached()
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(len(examples), 3)
+
+    def test_touched_file_is_not_reparsed(self):
+        self.run_cached()
+        stat = os.stat(self.paths[0])
+        os.utime(self.paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        _, cache = self.run_cached()
+        self.assertEqual((cache.hits, cache.misses), (2, 0))
+
+    def test_file_modified_whilst_parsed(self):
+        config = self.make_config()
+        workflow._set_config(config)
+        cache = ExtractionCache(config)
+        self.assertIsNone(cache.get(self.paths[0]))
+        examples, line_ranges, _, _ = workflow._parse_file(config, self.paths[0])
+        # the same size, but another modification time
+        with open(self.paths[0], "w", encoding="utf8") as fh:
+            fh.write(self.text.replace("this snippet", "snippet 9"))
+        stat = os.stat(self.paths[0])
+        os.utime(self.paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        cache.put(self.paths[0], examples, line_ranges)
+        cache.save()
+
+        examples, cache = self.run_cached()
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+        self.assertIn((self.paths[0], 1, "snippet 9"), examples)
+
+    def test_parsing_options_invalidate_cache(self):
+        self.run_cached()
+        config = self.make_config()
+        config.replacements = {"print": "log"}
+
+        examples, cache = self.run_cached(config)
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+        self.assertIn("    log(item.name)", next(iter(examples.values())))
+
+    def test_run_uses_cache(self):
+        workflow.run(self.make_config())
+        self.assertTrue(os.path.exists(Path(self.tmpdir.name).joinpath("cache.json")))
+
+        examples, paths, failures = workflow.run(self.make_config())
+        self.assertEqual(failures, [])
+        self.assertEqual(len(examples), 2)
@@ -7,8 +7,10 @@ import shutil
 import filecmp
 import subprocess
 import sys
+import tempfile
 import textwrap
 import unittest
+from pathlib import Path
 
 from snippet import config as snippet_config
 
@@ -93,8 +95,101 @@ class Test(unittest.TestCase):
             )
         )
 
+    def test_profiles(self):
+        profiles_fp = os.path.join(tmp_test_dir, "profiles.toml")
+        with open(profiles_fp, "w", encoding="utf8") as fh:
+            fh.write(
+                textwrap.dedent(
+                    """
+            [snippet]
+            cache_path = "cache.json"
+            [snippet.profiles.cpp]
+            input_glob = "**/*.cpp"
+            language_name = "cpp"
+            [snippet.profiles.python]
+            input_glob = "**/*.py"
+            cache_path = "python.json"
+            """
+                ).lstrip()
+            )
+        more_profiles_fp = os.path.join(tmp_test_dir, "more_profiles.toml")
+        with open(more_profiles_fp, "w", encoding="utf8") as fh:
+            fh.write('[snippet.profiles.cpp]\ncomment_prefix = "// "\n')
+
+        config = snippet_config.get_config(config_paths=[self.tmp_fp, profiles_fp, more_profiles_fp])
+        profiles = snippet_config.get_profiles(config)
+        self.assertEqual(list(profiles), ["cpp", "python"])
+        cpp = profiles["cpp"]
+        self.assertEqual((cpp.input_glob, cpp.language_name, cpp.comment_prefix), ("**/*.cpp", "cpp", "// "))
+        self.assertEqual((cpp.end_flag, cpp.profiles, cpp.cache_path), ("custom value", {}, "cache.cpp.json"))
+        self.assertEqual((profiles["python"].language_name, profiles["python"].cache_path), ("python", "python.json"))
+
     def test_auto_config(self):
         # load config, without explicitly setting the config path
         config = snippet_config.get_config()
         self.assertEqual(config.end_flag, "custom value")
         self.assertEqual(config.fizz, "buzz")
+
+
+class TestDiscovery(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name).joinpath("repo")
+        self.write(".git/config.toml", "[snippet]\nfoo = 'git'\n")
+        self.write("snippet.toml", "[snippet]\nfoo = 'root'\n")
+        self.write("project/docs/snippet.toml", "[snippet.profile]\nfoo = 'docs'\n")
+        self.write("project/pyproject.toml", "[tool.black]\nline-length = 120\n")
+        self.write("project/node_modules/package/snippet.toml", "[snippet]\nfoo = 'node_modules'\n")
+        self.write("project/.venv/snippet.toml", "[snippet]\nfoo = 'hidden'\n")
+        self.write("project/env/pyvenv.cfg", "")
+        self.write("project/env/snippet.toml", "[snippet]\nfoo = 'venv'\n")
+        self.write("project/empty/pyproject.toml", "snippet.foo = 'dotted'\n")
+        self.write("project/inline/pyproject.toml", "snippet = { foo = 'inline' }\n")
+        self.write("project/quoted/snippet.toml", "\"snippet\" = {foo = 'quoted'}\n")
+        self.write("project/other/pyproject.toml", "snippets = { foo = 'other' }\n")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, path, content):
+        path = self.root.joinpath(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf8") as fh:
+            fh.write(content)
+
+    def test_search_project(self):
+        project = self.root.joinpath("project")
+        self.assertEqual(
+            snippet_config._discover_configs(str(project)),
+            [
+                str(project.joinpath("docs", "snippet.toml")),
+                str(project.joinpath("empty", "pyproject.toml")),
+                str(project.joinpath("inline", "pyproject.toml")),
+                str(project.joinpath("quoted", "snippet.toml")),
+            ],
+        )
+
+    def test_search_parents(self):
+        project = self.root.joinpath("project", "docs", "nothing_here")
+        project.mkdir()
+        self.assertEqual(
+            snippet_config._discover_configs(str(project)),
+            [str(self.root.joinpath("snippet.toml")), str(self.root.joinpath("project", "docs", "snippet.toml"))],
+        )
+        self.assertEqual(snippet_config.get_config(project_root=str(project)).profile, dict(foo="docs"))
+
+    def test_config_files_changed(self):
+        project = self.root.joinpath("project", "docs")
+        self.assertEqual(snippet_config._discover_configs(str(project)), [str(project.joinpath("snippet.toml"))])
+
+        self.write("project/docs/api/snippet.toml", "[snippet]\nfoo = 'api'\n")
+        self.write("project/docs/snippet.toml", "[tool.black]\nline-length = 120\n")
+        self.assertEqual(
+            snippet_config._discover_configs(str(project)), [str(project.joinpath("api", "snippet.toml"))]
+        )
+
+    def test_inline_tables(self):
+        for name in ["inline", "quoted"]:
+            with self.subTest(name=name):
+                project = self.root.joinpath("project", name)
+                self.assertEqual(snippet_config.get_config(project_root=str(project)).foo, name)
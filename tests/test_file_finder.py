@@ -0,0 +1,116 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import fnmatch
+import glob
+import os
+import re
+import tempfile
+import unittest
+import warnings
+from pathlib import Path
+from unittest import mock
+
+from snippet._internal import file_finder
+from snippet._internal.file_finder import find_files, find_files_for_each
+
+
+class TestFindFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+        for name in [
+            "a.py",
+            "b.txt",
+            ".hidden.py",
+            "src/c.py",
+            "src/deep/d.py",
+            "src/deep/e.txt",
+            "build/f.py",
+            ".git/g.py",
+            "docs/h.py",
+        ]:
+            path = Path(self.root).joinpath(name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("x")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def path(self, *names):
+        return os.path.join(self.root, *names)
+
+    def find(self, patterns, **kwargs):
+        return find_files([self.path(pattern) for pattern in patterns], root=self.root, **kwargs)
+
+    def test_same_as_glob(self):
+        for pattern in ["*.py", "**/*.py", "src/**", "src/*/*.py", "**/[cd].py", "src/deep/d.py", "*", ".*"]:
+            with self.subTest(pattern=pattern):
+                expected = sorted(p for p in glob.glob(self.path(pattern), recursive=True) if os.path.isfile(p))
+                self.assertEqual(self.find([pattern]), expected)
+
+    def test_character_sets(self):
+        # as fnmatch, without warnings about set operations
+        names = ["[x].py", "x.py", "&.py", "~.py", "|.py", "].py", "!.py", "^.py", "a.py", "-.py"]
+        for pattern in ["[[]x].py", "[&&~~||].py", "[]].py", "[!]].py", "[!a].py", "[^].py", "[a-].py", "[!].py"]:
+            with self.subTest(pattern=pattern):
+                with warnings.catch_warnings():
+                    warnings.simplefilter("error")
+                    regex = re.compile(file_finder._translate(pattern))
+                self.assertEqual([name for name in names if regex.fullmatch(name)], fnmatch.filter(names, pattern))
+
+    def test_overlapping_patterns(self):
+        self.assertEqual(
+            self.find(["**/*.py", "src/*.py", "src/c.py"]),
+            [self.path(name) for name in ["a.py", "build/f.py", "docs/h.py", "src/c.py", "src/deep/d.py"]],
+        )
+
+    def test_exclude(self):
+        found = self.find(["**/*.py"], exclude=[self.path("build"), self.path("**/deep/*.py")])
+        self.assertEqual(found, [self.path(name) for name in ["a.py", "docs/h.py", "src/c.py"]])
+
+    def test_trailing_double_star_after_a_file(self):
+        # `a.py/**` does not match the file a.py, whether or not the traversal starts from a.py
+        for patterns in [["a.py/**"], ["a.py/**", "**/b.txt"], [".hidden.py/**", "**/b.txt"]]:
+            with self.subTest(patterns=patterns):
+                expected = sorted(
+                    path
+                    for pattern in patterns
+                    for path in glob.glob(self.path(pattern), recursive=True)
+                    if os.path.isfile(path)
+                )
+                self.assertEqual(self.find(patterns), expected)
+
+    def test_missing_literal_path(self):
+        self.assertEqual(self.find(["missing/*.py", "nothing.py"]), [])
+
+    def test_ignore_files(self):
+        Path(self.path(".gitignore")).write_text("# comment\nbuild/\n*.txt\n/docs\nsrc/deep/*\n!src/deep/e.txt\n")
+        found = self.find(["**/*"], ignore_file_names=[".gitignore"])
+        self.assertEqual(found, [self.path(name) for name in ["a.py", "src/c.py", "src/deep/e.txt"]])
+
+    def test_nested_ignore_file(self):
+        Path(self.path("src", ".gitignore")).write_text("*.py\n")
+        found = self.find(["**/*.py"], ignore_file_names=[".gitignore"])
+        self.assertEqual(found, [self.path(name) for name in ["a.py", "build/f.py", "docs/h.py"]])
+
+    def test_ignore_file_above_search(self):
+        Path(self.path(".gitignore")).write_text("deep\n")
+        found = self.find(["src/**/*.py"], ignore_file_names=[".gitignore"])
+        self.assertEqual(found, [self.path("src", "c.py")])
+
+    def test_find_files_for_each(self):
+        pairs = [
+            (["**/*.py"], ["build", "src/deep"]),
+            (["src/**/*", "*.txt"], ["build", "**/*.py"]),
+            (["src/*.py", "docs/*.py"], []),
+        ]
+        pairs = [([self.path(p) for p in include], [self.path(p) for p in exclude]) for include, exclude in pairs]
+        expected = [find_files(include, exclude, root=self.root) for include, exclude in pairs]
+        with mock.patch.object(file_finder.os, "scandir", wraps=os.scandir) as scandir:
+            self.assertEqual(find_files_for_each(pairs, root=self.root), expected)
+        # each directory is only listed once
+        listed = [args[0] for args, _ in scandir.call_args_list]
+        self.assertEqual(len(listed), len(set(listed)))
+        self.assertEqual(expected[1], [self.path(name) for name in ["b.txt", "src/deep/e.txt"]])
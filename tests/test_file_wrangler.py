@@ -0,0 +1,156 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import os
+import tempfile
+import types
+import unittest
+from pathlib import Path
+
+from snippet._internal import file_wrangler
+from snippet._internal.logs import LOGGER
+from snippet.config import Config
+
+
+class TestReadLines(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmpdir.name).joinpath("sample.txt"))
+        with open(self.path, "w", encoding="utf8", newline="") as fh:
+            fh.write("first\r\nsecond\nthird")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_iter_file_lines(self):
+        lines = file_wrangler.iter_file_lines(self.path)
+        self.assertIsInstance(lines, types.GeneratorType)
+        self.assertEqual(next(lines), "first\n")
+        self.assertEqual(list(lines), ["second\n", "third"])
+
+    def test_load_file_lines(self):
+        self.assertEqual(file_wrangler.load_file_lines(self.path), ["first\n", "second\n", "third"])
+
+    def test_iter_file_bytes(self):
+        self.assertEqual(list(file_wrangler.iter_file_bytes(self.path)), [b"first\r\n", b"second\n", b"third"])
+
+    def test_bare_carriage_returns(self):
+        # lines are split as in text mode
+        with open(self.path, "wb") as fh:
+            fh.write(b"first\rsecond\r\n\rthird\r\rfourth\nfifth\r")
+        self.assertEqual(
+            list(file_wrangler.iter_file_bytes(self.path)),
+            [b"first\r", b"second\r\n", b"\r", b"third\r", b"\r", b"fourth\n", b"fifth\r"],
+        )
+        self.assertEqual(len(file_wrangler.load_file_lines(self.path)), 7)
+
+
+class TestEncodings(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config = Config()
+        self.config.project_root = self.tmpdir.name
+        self.config.encodings = {"legacy/**/*.c": "latin-1", "*.txt": "utf-16"}
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, content):
+        path = str(Path(self.tmpdir.name).joinpath(name))
+        with open(path, "wb") as fh:
+            fh.write(content)
+        return path
+
+    def test_get_encoding(self):
+        root = Path(self.tmpdir.name)
+        self.assertEqual(file_wrangler.get_encoding(self.config, str(root.joinpath("legacy", "a", "b.c"))), "latin-1")
+        self.assertEqual(file_wrangler.get_encoding(self.config, str(root.joinpath("notes.txt"))), "utf-16")
+        self.assertEqual(file_wrangler.get_encoding(self.config, str(root.joinpath("src", "b.c"))), "utf8")
+
+    def test_is_ascii_compatible(self):
+        for encoding, expected in [("utf8", True), ("latin-1", True), ("cp1252", True), ("utf-16", False)]:
+            with self.subTest(encoding=encoding):
+                self.assertEqual(file_wrangler.is_ascii_compatible(encoding), expected)
+
+    def test_has_markers(self):
+        marker = Config.start_flag.encode("ascii")
+        self.assertTrue(file_wrangler.has_markers(self.config, self.write("text.c", b"# " + marker)))
+        self.assertFalse(file_wrangler.has_markers(self.config, self.write("plain.c", b"# nothing")))
+        # binary files are skipped
+        self.assertFalse(file_wrangler.has_markers(self.config, self.write("binary.o", b"\x7fELF\0\0" + marker)))
+        # files in other encodings are not scanned
+        self.assertTrue(
+            file_wrangler.has_markers(self.config, self.write("wide.txt", "nothing".encode("utf-16")), "utf-16")
+        )
+
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config = Config()
+        self.config.output_dir = str(Path(self.tmpdir.name).joinpath("out"))
+        self.config.output_file_name_template = "{{name}}.txt"
+        self.config.output_template = "{{{code}}}\n"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def read(self, name):
+        with open(Path(self.config.output_dir).joinpath(name), encoding="utf8") as fh:
+            return fh.read()
+
+    def write_all(self, examples):
+        writer = file_wrangler.OutputWriter(self.config)
+        for name, code in examples:
+            writer.add(name, code)
+        for output_file in writer.output_files:
+            writer.write(output_file)
+        return writer
+
+    def test_groups_examples_by_output_file(self):
+        self.config.output_append = True
+        writer = self.write_all([("a", "1"), ("b", "2"), ("a", "3")])
+
+        self.assertEqual(self.read("a.txt"), "1\n3\n")
+        self.assertEqual(self.read("b.txt"), "2\n")
+        self.assertEqual((writer.files_written, writer.bytes_written), (2, 6))
+
+        self.write_all([("a", "4")])
+        self.assertEqual(self.read("a.txt"), "1\n3\n4\n")
+
+    def test_overwrites(self):
+        self.config.output_append = False
+        self.write_all([("a", "1"), ("a", "2")])
+        self.assertEqual(self.read("a.txt"), "2\n")
+
+        writer = self.write_all([("a", "3")])
+        self.assertEqual(self.read("a.txt"), "3\n")
+        self.assertEqual(sorted(Path(self.config.output_dir).iterdir()), [Path(writer.output_files[0])])
+
+    def test_skip_unchanged(self):
+        self.config.output_append = False
+        self.config.output_skip_unchanged = True
+        self.write_all([("a", "1"), ("b", "2")])
+        output_file = Path(self.config.output_dir).joinpath("a.txt")
+        os.utime(output_file, ns=(0, 0))
+
+        writer = self.write_all([("a", "1"), ("b", "3")])
+        self.assertEqual((writer.files_written, writer.files_unchanged), (1, 1))
+        self.assertEqual(os.stat(output_file).st_mtime_ns, 0)
+        self.assertEqual(self.read("b.txt"), "3\n")
+
+    def test_skip_unchanged_whilst_appending(self):
+        self.config.output_append = True
+        self.config.output_skip_unchanged = True
+        with self.assertLogs(LOGGER, "WARNING") as logs:
+            file_wrangler.OutputWriter(self.config)
+        self.assertIn("output_skip_unchanged has no effect", logs.output[0])
+
+        with self.assertRaises(AssertionError):
+            with self.assertLogs(LOGGER, "WARNING"):
+                file_wrangler.OutputWriter(self.config, overwrite=True)
+
+    def test_write_example(self):
+        file_wrangler.write_example(self.config, "Some Example", "code")
+        self.assertEqual(self.read("some_example.txt"), "code\n")
@@ -0,0 +1,57 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import os
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+from snippet import exceptions
+from snippet._internal import git
+
+
+def make_repository(directory):
+    for args in (["init", "-q"], ["config", "user.email", "a@b.c"], ["config", "user.name", "a"]):
+        subprocess.run(["git", "-C", directory] + args, check=True)
+
+
+def commit(directory):
+    subprocess.run(["git", "-C", directory, "add", "-A"], check=True)
+    subprocess.run(["git", "-C", directory, "commit", "-q", "-m", "commit"], check=True)
+
+
+class TestChangedFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = os.path.realpath(self.tmpdir.name)
+        make_repository(self.root)
+        for name in ["a.py", "b.py", "sub/c.py", "sub/d.py"]:
+            self.write(name, "x")
+        commit(self.root)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, text):
+        path = Path(self.root).joinpath(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+    def test_changes(self):
+        self.write("a.py", "committed")
+        commit(self.root)
+        self.write("sub/c.py", "modified")
+        self.write("sub/e.py", "untracked")
+        self.write("ignored.py", "ignored")
+        self.write(".gitignore", "ignored.py\n")
+        os.remove(os.path.join(self.root, "b.py"))
+
+        changed = git.changed_files(os.path.join(self.root, "sub"), "HEAD~1")
+        expected = [".gitignore", "a.py", "b.py", "sub/c.py", "sub/e.py"]
+        self.assertEqual(changed, {os.path.join(self.root, *name.split("/")) for name in expected})
+
+    def test_unknown_ref(self):
+        with self.assertRaises(exceptions.VersionControlError):
+            git.changed_files(self.root, "no-such-ref")
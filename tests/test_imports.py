@@ -0,0 +1,65 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from tests import sample_input_dir
+
+ROOT = str(Path(__file__).parent.parent)
+# modules which are slow to import, and only needed by some runs
+HEAVY_MODULES = [
+    "concurrent.futures",
+    "ctypes",
+    "dotenv",
+    "hashlib",
+    "multiprocessing",
+    "pystache",
+    "random",
+    "subprocess",
+    "tempfile",
+    "toml",
+]
+
+
+def heavy_modules_imported(code, cwd):
+    # a fresh interpreter, so that modules imported by other tests do not count
+    script = f"{code}\nimport json, sys\nprint(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+    )
+    return json.loads(result.stdout.decode("utf8").splitlines()[-1])
+
+
+class TestLazyImports(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def extract(self, **options):
+        options.update(project_root=self.tmpdir.name, input_glob=str(sample_input_dir.joinpath("example.py")))
+        return (
+            "from snippet import api, config\n"
+            f"api.extract_code_snippets(config.get_config(output_dir='out', **{options!r}))"
+        )
+
+    def test_cli(self):
+        self.assertEqual(heavy_modules_imported("import snippet.cli", self.tmpdir.name), [])
+
+    def test_simple_run(self):
+        self.assertEqual(heavy_modules_imported(self.extract(), self.tmpdir.name), [])
+
+    def test_optional_features(self):
+        Path(self.tmpdir.name).joinpath("snippet.toml").write_text("[snippet]\n")
+        code = self.extract(output_template="{{#code}}{{{code}}}{{/code}}", cache_path="cache.json")
+        imported = heavy_modules_imported(code, self.tmpdir.name)
+        self.assertEqual(sorted(set(imported) & {"hashlib", "pystache", "toml"}), ["hashlib", "pystache", "toml"])
@@ -0,0 +1,73 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import hashlib
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from snippet import workflow
+from snippet.config import Config
+from tests import test_parser as P
+
+TEXT = "".join(["blah blah\n", P.start, "this snippet", P.newline, P.A, P.B, P.C, P.stop])
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        for name, example_names in [("a.txt", ["snippet 1", "snippet 2"]), ("b.txt", ["snippet 3"])]:
+            with open(Path(self.tmpdir.name).joinpath(name), "w", encoding="utf8") as fh:
+                fh.write("".join(TEXT.replace("this snippet", example_name) for example_name in example_names))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def run_with_manifest(self, **options):
+        config = Config()
+        config.project_root = self.tmpdir.name
+        config.input_glob = "*.txt"
+        config.output_dir = "output"
+        config.manifest_path = "build/manifest.json"
+        for name, value in options.items():
+            setattr(config, name, value)
+        examples, paths, failures = workflow.run(config)
+        self.assertEqual(failures, [])
+        with open(config.manifest_path, encoding="utf8") as fh:
+            return fh.read()
+
+    def expected_records(self):
+        sha256 = hashlib.sha256(P.sample_output.encode("utf8")).hexdigest()
+        return [
+            dict(name="snippet 1", path="a.txt", start_line=2, end_line=6, output_path="output/snippet_1.md"),
+            dict(name="snippet 2", path="a.txt", start_line=8, end_line=12, output_path="output/snippet_2.md"),
+            dict(name="snippet 3", path="b.txt", start_line=2, end_line=6, output_path="output/snippet_3.md"),
+        ], sha256
+
+    def test_json(self):
+        records, sha256 = self.expected_records()
+        document = json.loads(self.run_with_manifest())
+        self.assertEqual(document["version"], 1)
+        self.assertEqual(document["examples"], [dict(record, sha256=sha256) for record in records])
+
+    def test_ndjson(self):
+        records, sha256 = self.expected_records()
+        lines = self.run_with_manifest(manifest_format="ndjson").splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [dict(record, sha256=sha256) for record in records])
+
+    def test_from_cache(self):
+        first = self.run_with_manifest(cache_path="cache.json")
+        self.assertEqual(self.run_with_manifest(cache_path="cache.json"), first)
+
+    def test_unknown_format(self):
+        config = Config()
+        config.project_root = self.tmpdir.name
+        config.input_glob = "*.txt"
+        config.output_dir = "output"
+        config.manifest_path = "manifest.xml"
+        config.manifest_format = "xml"
+        examples, paths, failures = workflow.run(config)
+        self.assertEqual(len(failures), 1)
+        self.assertIn("unknown manifest format", failures[0][1])
@@ -0,0 +1,64 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import random
+import unittest
+
+from snippet._internal.matcher import Matcher
+
+markers = ("an example", "end of example", "uncloak", "cloak")
+
+
+def replace_in_turn(replacements, line):
+    for before, after in replacements:
+        line = line.replace(before, after)
+    return line
+
+
+class Test(unittest.TestCase):
+    def replace(self, replacements, line):
+        return Matcher(markers, (), tuple(replacements), ()).replace(line)
+
+    def test_independent_replacements(self):
+        replacements = [("self.", ""), ("my_", "your_"), ("print", "log")]
+        line = "print(self.my_api, self.x)"
+        self.assertEqual(self.replace(replacements, line), "log(my_api, x)".replace("my_", "your_"))
+
+    def test_interacting_replacements(self):
+        cases = [
+            # the result of a replacement contains the phrase of a later one
+            ([("my_", "your_"), ("your_api", "their_api")], "my_api", "their_api"),
+            # phrases overlapping each other
+            ([("bc", "Y"), ("ab", "X")], "abc", "aY"),
+            ([("a", "1"), ("ab", "2")], "ab", "1b"),
+            # an empty replacement bringing together the phrase of a later one
+            ([("-", ""), ("ab", "X")], "a-b", "X"),
+            # an empty phrase
+            ([("", "-"), ("a", "b")], "aa", "-b-b-"),
+        ]
+        for replacements, line, expected in cases:
+            with self.subTest(replacements=replacements):
+                self.assertEqual(self.replace(replacements, line), expected)
+
+    def test_same_as_replacing_in_turn(self):
+        rng = random.Random(1234)
+        alphabet = "abc."
+        for _ in range(2000):
+            replacements = dict()
+            for _ in range(rng.randint(1, 4)):
+                before = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 3)))
+                replacements[before] = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 3)))
+            line = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+            with self.subTest(replacements=replacements, line=line):
+                self.assertEqual(
+                    self.replace(replacements.items(), line), replace_in_turn(replacements.items(), line)
+                )
+
+    def test_drop_patterns(self):
+        matcher = Matcher(markers, ("skip",), (), (), (r"^\s*#", r"(\w)\1{3}", r"(?i)debug"), ())
+        self.assertTrue(matcher.should_drop("  # a comment"))
+        self.assertTrue(matcher.should_drop("xxxx"))
+        self.assertTrue(matcher.should_drop("DEBUG(x)"))
+        self.assertTrue(matcher.should_drop("skip me"))
+        self.assertFalse(matcher.should_drop("a = 1  # not at the start"))
@@ -0,0 +1,60 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from snippet._internal import monitor
+
+
+class TestPolling(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmpdir.name).joinpath("sample.txt"))
+        with open(self.path, "w", encoding="utf8") as fh:
+            fh.write("a")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_monitor(self):
+        return monitor.PollingMonitor(0.01)
+
+    def test_detects_changes(self):
+        file_monitor = self.make_monitor()
+        try:
+            file_monitor.track([self.path])
+            self.assertEqual(file_monitor.wait(0.05), set())
+
+            with open(self.path, "a", encoding="utf8") as fh:
+                fh.write("b")
+            self.assertEqual(file_monitor.wait(1), {self.path})
+
+            os.remove(self.path)
+            self.assertEqual(file_monitor.wait(1), {self.path})
+        finally:
+            file_monitor.close()
+
+    def test_poll(self):
+        file_monitor = monitor.PollingMonitor(0.01)
+        file_monitor.track([self.path])
+        self.assertEqual(file_monitor.poll(), set())
+
+        with open(self.path, "a", encoding="utf8") as fh:
+            fh.write("b")
+        self.assertEqual(file_monitor.poll([]), set())
+        self.assertEqual(file_monitor.poll([self.path]), {self.path})
+        # the change is only reported once
+        self.assertEqual(file_monitor.poll(), set())
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is only available on linux")
+class TestInotify(TestPolling):
+    def make_monitor(self):
+        file_monitor = monitor.create_monitor(0.01)
+        self.assertIsInstance(file_monitor, monitor.InotifyMonitor)
+        return file_monitor
@@ -0,0 +1,77 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from snippet.config import Config
+from snippet._internal.name_index import NameIndex, duplicate_name
+
+
+class TestNameIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config = Config()
+        self.config.name_index_path = str(Path(self.tmpdir.name).joinpath("names.json"))
+        self.paths = [str(Path(self.tmpdir.name).joinpath(f"sample{i}.txt")) for i in range(2)]
+        for path in self.paths:
+            with open(path, "w", encoding="utf8") as fh:
+                fh.write("sample")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_duplicates(self):
+        names = NameIndex(self.config)
+        self.assertEqual(names.add_file(self.paths[0], [(self.paths[0], 1, "a"), (self.paths[0], 5, "b")]), [])
+        duplicates = names.add_file(self.paths[1], [(self.paths[1], 2, "b"), (self.paths[1], 6, "a")])
+        self.assertEqual(
+            duplicates,
+            [((self.paths[1], 2, "b"), (self.paths[0], 5, "b")), ((self.paths[1], 6, "a"), (self.paths[0], 1, "a"))],
+        )
+        self.assertEqual(sorted(names.duplicates()), sorted(duplicates))
+        self.assertEqual(str(duplicate_name(duplicates)).count("\n"), 1)
+
+        # replacing the examples of a file
+        self.assertEqual(names.add_file(self.paths[1], [(self.paths[1], 2, "c")]), [])
+        self.assertEqual(names.duplicates(), [])
+        names.remove_file(self.paths[0])
+        self.assertEqual(names.locations("a"), [])
+        self.assertEqual(names.locations("c"), [(self.paths[1], 2, "c")])
+
+    def test_persistence(self):
+        names = NameIndex(self.config)
+        names.add_file(self.paths[0], [(self.paths[0], 1, "a")])
+        names.add_file(self.paths[1], [(self.paths[1], 1, "b")])
+        names.save()
+
+        with open(self.paths[1], "a", encoding="utf8") as fh:
+            fh.write("changed")
+        names = NameIndex(self.config)
+        names.load()
+        self.assertEqual(names.names(self.paths[0]), ["a"])
+        self.assertEqual((names.is_current(self.paths[0]), names.is_current(self.paths[1])), (True, False))
+
+        names.retain(self.paths[1:])
+        self.assertEqual(names.locations("a"), [])
+
+    def test_outdated(self):
+        names = NameIndex(self.config)
+        names.add_file(self.paths[0], [(self.paths[0], 1, "a")])
+        names.save()
+
+        self.config.start_flag = "another flag"
+        names = NameIndex(self.config)
+        names.load()
+        self.assertEqual(names.locations("a"), [])
+
+    def test_not_saved(self):
+        self.config.name_index_path = None
+        names = NameIndex(self.config)
+        names.add_file(self.paths[0], [(self.paths[0], 1, "a")])
+        names.save()
+        self.assertFalse(names.is_current(self.paths[0]))
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), ["sample0.txt", "sample1.txt"])
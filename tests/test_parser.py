@@ -3,7 +3,7 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 import unittest
-from snippet.snippet import extract_snippets_from_text
+from snippet.snippet import extract_snippets_from_bytes, extract_snippets_from_text
 from snippet.config import Config
 from snippet import exceptions
 
@@ -183,3 +183,87 @@ class Test(unittest.TestCase):
         config = Config()
         config.replacements = {"self.": ""}
         self.go_exact(config, [start, "test", newline, "self." + A, B, C, stop])
+
+    def test_drop_lines_sharing_prefixes(self):
+        config = Config()
+        config.drop_lines = ["# ignore", "# ignore me", "# skip", "# i"]
+        self.go_exact(config, [start, "test", newline, A, "# skip this\n", B, "# ignored\n", C, stop])
+
+    def test_chained_replacements(self):
+        # replacements apply in order, each to the result of the previous one
+        config = Config()
+        config.replacements = {"my_": "your_", "your_api": "their_api"}
+        self.assertEqual(self.go(config, [start, "test", newline, A, stop]), ["items = their_api().list_items()"])
+
+    def test_replacements_in_a_single_pass(self):
+        config = Config()
+        config.replacements = {"my_": "your_", "items": "things", "print": "log"}
+        self.assertEqual(
+            self.go(config, [start, "test", newline, A, B, C, stop]),
+            ["things = your_api().list_things()\nfor item in things:\n    log(item.name)"],
+        )
+
+    def test_replacement_patterns(self):
+        # applied in order, after the other replacements
+        config = Config()
+        config.replacements = {"my_api": "api"}
+        config.replacement_patterns = {r"(\w+)\(\)": r"\1(client)", r"\bapi\b": "service"}
+        self.assertEqual(
+            self.go(config, [start, "test", newline, A, stop]), ["items = service(client).list_items(client)"]
+        )
+
+    def test_drop_patterns(self):
+        config = Config()
+        config.drop_patterns = [r"^\s*#", r"(?i)^DEBUG"]
+        self.go_exact(config, [start, "test", newline, A, "  # a comment\n", B, "debug(items)\n", C, stop])
+
+    def test_trigger_phrase_reported(self):
+        config = Config()
+        config.fail_on_contains = ["zzz", "item.name", "print"]
+        with self.assertRaisesRegex(exceptions.ValidationFailure, "'item.name'"):
+            self.go_exact(config, [start, "test", newline, A, B, C, stop])
+
+    def test_marker_precedence(self):
+        # markers are checked in order: start, end, uncloak then cloak
+        config = Config()
+        config.cloak_flag = "hide"
+        config.uncloak_flag = "unhide"
+        self.go_exact(
+            config, [start, "test", newline, A, "# hide\n", "ignore this stuff\n", "# unhide\n", B, C, stop]
+        )
+        with self.assertRaises(exceptions.StartEndMismatch):
+            self.go(config, [start, "test", newline, A, f"# {Config.end_flag} {Config.start_flag}\n", B, C, stop])
+
+    def test_trigger_phrase_outside_example(self):
+        self.go_exact(Config(), ["assert True\n", start, "test", newline, A, B, C, stop, "assert False\n"])
+
+    def test_line_ranges(self):
+        text = "".join(["some stuff\n", start, "test 1", newline, A, B, stop, start, "test 2", newline, C, stop])
+        line_ranges = dict()
+        result = extract_snippets_from_text(Config(), text.splitlines(), "dummy_path", line_ranges)
+        self.assertEqual(
+            line_ranges, {("dummy_path", 1, "test 1"): (1, 4), ("dummy_path", 5, "test 2"): (5, 7)},
+        )
+        self.assertEqual(list(line_ranges), list(result))
+
+
+class TestBytes(Test):
+    # the same tests, parsing raw lines with windows line endings
+    def go(self, config, sequence):
+        lines = "".join(sequence).replace("\n", "\r\n").encode("utf8").splitlines(keepends=True)
+        result = extract_snippets_from_bytes(config, lines, "dummy_path")
+        return ["\n".join(block) for k, block in result.items()]
+
+    def test_only_decodes_examples(self):
+        text = "".join([start, "caf\xe9", newline, "x = 'd\xe9j\xe0 vu'\n", stop])
+        expected = {("dummy_path", 1, "caf\xe9"): ["x = 'd\xe9j\xe0 vu'"]}
+        for encoding in ["utf8", "latin-1", "cp1252"]:
+            with self.subTest(encoding=encoding):
+                # the first line cannot be decoded as utf8
+                lines = (b"\xe9\xff not text\n" + text.encode(encoding)).splitlines(keepends=True)
+                result = extract_snippets_from_bytes(Config(), lines, "dummy_path", encoding=encoding)
+                self.assertEqual(result, expected)
+
+        lines = text.encode("latin-1").splitlines(keepends=True)
+        with self.assertRaises(UnicodeDecodeError):
+            extract_snippets_from_bytes(Config(), lines, "dummy_path")
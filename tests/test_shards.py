@@ -0,0 +1,100 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import os
+import unittest
+from pathlib import Path
+
+from snippet import exceptions
+from snippet import workflow
+from snippet.config import Config
+from snippet._internal import shards
+from tests import SampleProject
+
+
+class TestShardSelection(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(shards.parse_shard("2/5"), (2, 5))
+        for shard in ["0/5", "6/5", "5", "a/b", "1/2/3"]:
+            with self.subTest(shard=shard):
+                with self.assertRaises(ValueError):
+                    shards.parse_shard(shard)
+
+    def test_partition(self):
+        config = Config()
+        config.project_root = "/project"
+        paths = [f"/project/docs/sample{i}.py" for i in range(100)]
+        selected = [shards.select_paths(config, paths, index, 4) for index in range(1, 5)]
+        self.assertEqual(sorted(path for shard_paths in selected for path in shard_paths), sorted(paths))
+        self.assertTrue(all(shard_paths for shard_paths in selected))
+
+        # the same whatever the location of the project
+        config.project_root = "/elsewhere"
+        moved_paths = [path.replace("/project", "/elsewhere") for path in selected[0]]
+        self.assertEqual(shards.select_paths(config, moved_paths, 1, 4), moved_paths)
+
+
+class TestShards(SampleProject, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.paths = [self.write(f"sample{i}.txt", f"snippet {i}") for i in range(6)]
+
+    def make_config(self, **options):
+        return super().make_config(manifest_path="manifest.json", **options)
+
+    def run_shards(self, count):
+        for index in range(1, count + 1):
+            examples, paths, failures = workflow.run(self.make_config(shard=f"{index}/{count}"))
+            self.assertEqual(failures, [])
+        self.assertFalse(Path(self.root).joinpath("output").exists())
+
+    def read_outputs(self):
+        outputs = dict()
+        for path in sorted(Path(self.root).joinpath("output").iterdir()):
+            outputs[path.name] = path.read_text(encoding="utf8")
+        outputs["manifest.json"] = Path(self.root).joinpath("manifest.json").read_text(encoding="utf8")
+        return outputs
+
+    def test_merge(self):
+        self.write("sample5.txt", "snippet 5", "snippet 6")
+        self.run_shards(3)
+        merged_examples, failures = workflow.merge(self.make_config())
+        self.assertEqual((len(merged_examples), failures), (7, []))
+        merged = self.read_outputs()
+
+        # the same as a run which is not sharded
+        Path(self.root).joinpath("output").rename(Path(self.root).joinpath("merged"))
+        examples, _, _ = workflow.run(self.make_config())
+        self.assertEqual(merged_examples, examples)
+        self.assertEqual(list(merged_examples), list(examples))
+        self.assertEqual(self.read_outputs(), merged)
+
+    def test_duplicates_across_shards(self):
+        self.write("sample5.txt", "snippet 0")
+        self.run_shards(6)
+        with self.assertRaises(exceptions.DuplicateName):
+            workflow.merge(self.make_config())
+
+    def test_missing_shard(self):
+        self.run_shards(3)
+        os.remove(Path(self.root).joinpath("snippet-shards", "shard-2-of-3.json"))
+        with self.assertRaisesRegex(exceptions.ShardError, r"\[2\] of 3 are missing"):
+            workflow.merge(self.make_config())
+
+    def test_artifacts_of_another_run(self):
+        self.run_shards(2)
+        workflow.run(self.make_config(shard="1/3"))
+        with self.assertRaises(exceptions.ShardError):
+            workflow.merge(self.make_config())
+        artifacts = [str(Path(self.root).joinpath("snippet-shards", f"shard-{i}-of-2.json")) for i in (1, 2)]
+        self.assertEqual(len(workflow.merge(self.make_config(), artifacts)[0]), 6)
+
+    def test_other_parsing_options(self):
+        self.run_shards(2)
+        with self.assertRaisesRegex(exceptions.ShardError, "parsing options"):
+            workflow.merge(self.make_config(start_flag="another flag"))
+
+    def test_since(self):
+        with self.assertRaises(ValueError):
+            workflow.run(self.make_config(shard="1/2", since="HEAD"))
@@ -0,0 +1,38 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import unittest
+
+import pystache
+
+from snippet._internal.templates import compile_template
+from snippet.config import Config
+
+context = dict(name='<a "b"> & \'c\'', code="x = {'a': 1} < 2", comment_prefix="# ", language_name="python")
+
+
+class Test(unittest.TestCase):
+    def check(self, source, expect_simple):
+        template = compile_template(source)
+        self.assertEqual(template.is_simple, expect_simple)
+        self.assertEqual(template.render(**context), pystache.render(source, **context))
+
+    def test_default_templates(self):
+        self.check(Config.output_template, expect_simple=True)
+        self.check(Config.output_file_name_template, expect_simple=True)
+
+    def test_variables(self):
+        self.check("{{ name }}/{{&name}}/{{{ code }}}/{{missing}}", expect_simple=True)
+
+    def test_text_only(self):
+        self.check("example.md", expect_simple=True)
+
+    def test_sections(self):
+        self.check("{{#code}}{{code}}{{/code}}{{^missing}}none{{/missing}}", expect_simple=False)
+
+    def test_comments(self):
+        self.check("{{! a comment }}{{name}}", expect_simple=False)
+
+    def test_parsed_once(self):
+        self.assertIs(compile_template("{{name}}.md"), compile_template("{{name}}.md"))
@@ -2,14 +2,19 @@
 # Copyright (C) 2020 Arm Mbed. All rights reserved.
 # SPDX-License-Identifier: Apache-2.0
 #
+import os
 import tempfile
 import unittest
+from unittest import mock
 from pathlib import Path
 
 from snippet import exceptions
 from snippet import workflow
 from snippet.config import Config
+from snippet.stats import Stats
 from tests import test_parser as P
+from tests import SampleProject
+from tests.test_git import commit, make_repository
 
 
 class Test(unittest.TestCase):
@@ -70,7 +75,394 @@ class TestDuplicateNames(Test):
             super().test_read()
 
 
+class TestAllDuplicateNames(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        for i, example_names in enumerate([["a", "b"], ["b", "c"], ["c"], ["a"]]):
+            with open(Path(self.tmpdir.name).joinpath(f"sample{i}.txt"), "w", encoding="utf8") as fh:
+                fh.write("".join(Test.text.replace(Test.example_name, name) for name in example_names))
+        self.config = Config()
+        self.config.input_glob = str(Path(self.tmpdir.name).joinpath("*.txt"))
+        self.config.output_dir = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_reports_all_duplicates(self):
+        with mock.patch.object(workflow, "_parse_file", wraps=workflow._parse_file) as parse_file:
+            with self.assertRaises(exceptions.DuplicateName) as context:
+                workflow.run(self.config)
+        self.assertEqual(str(context.exception).count("Example with duplicate name"), 3)
+        self.assertEqual(parse_file.call_count, 4)
+
+    def test_fail_fast(self):
+        self.config.stop_on_first_failure = True
+        with mock.patch.object(workflow, "_parse_file", wraps=workflow._parse_file) as parse_file:
+            with self.assertRaises(exceptions.DuplicateName) as context:
+                workflow.run(self.config)
+        self.assertEqual(str(context.exception).count("Example with duplicate name"), 1)
+        self.assertEqual(parse_file.call_count, 2)
+
+
 class TestNoExamplesInFile(Test):
     expect_examples = 0
     text = "".join(["blah blah\n", Test.example_name, P.newline, P.A, P.B, P.C, "# rhubarb\n"])
     text = text + "\n" + text
+
+
+class TestOverlappingGlobs(Test):
+    def test_read_once(self):
+        with open(self.tmp_fp, "w", encoding="utf8") as fh:
+            fh.write(self.text)
+
+        config = Config()
+        config.input_glob = [self.tmp_fp, str(Path(self.tmpdir.name).joinpath("*.txt"))]
+        config.output_dir = self.tmpdir.name
+
+        examples, paths, failures = workflow.run(config)
+        self.assertEqual([self.tmp_fp], paths)
+        self.assertEqual(1, len(examples))
+
+
+class TestParallel(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        for i in range(10):
+            with open(Path(self.tmpdir.name).joinpath(f"sample{i}.txt"), "w", encoding="utf8") as fh:
+                fh.write(Test.text.replace(Test.example_name, f"snippet {i}"))
+        with open(Path(self.tmpdir.name).joinpath("sample_broken.txt"), "w", encoding="utf8") as fh:
+            fh.write("".join([P.start, "broken", P.newline, P.A]))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def run_workflow(self, workers, stop_on_first_failure=False, io_concurrency=1):
+        config = Config()
+        config.workers = workers
+        config.io_concurrency = io_concurrency
+        config.stop_on_first_failure = stop_on_first_failure
+        config.write_attempts = 1
+        config.input_glob = str(Path(self.tmpdir.name).joinpath("*.txt"))
+        config.output_dir = str(Path(self.tmpdir.name).joinpath(f"output_{workers}_{io_concurrency}"))
+        return workflow.run(config)
+
+    def test_matches_sequential(self):
+        examples, _, failures = self.run_workflow(workers=1)
+        parallel_examples, _, parallel_failures = self.run_workflow(workers=3)
+
+        self.assertEqual(len(examples), 10)
+        self.assertEqual(list(examples.items()), list(parallel_examples.items()))
+        self.assertEqual([path for path, _ in failures], [path for path, _ in parallel_failures])
+        self.assertIn("StartEndMismatch", parallel_failures[0][1])
+
+    def test_stop_on_first_failure(self):
+        with self.assertRaises(exceptions.StartEndMismatch):
+            self.run_workflow(workers=3, stop_on_first_failure=True)
+
+    def test_io_concurrency_matches_sequential(self):
+        examples, _, failures = self.run_workflow(workers=1)
+        concurrent_examples, _, concurrent_failures = self.run_workflow(workers=1, io_concurrency=4)
+
+        self.assertEqual(list(examples.items()), list(concurrent_examples.items()))
+        self.assertEqual([path for path, _ in failures], [path for path, _ in concurrent_failures])
+        sequential_output = Path(self.tmpdir.name).joinpath("output_1_1")
+        concurrent_output = Path(self.tmpdir.name).joinpath("output_1_4")
+        for path in sequential_output.iterdir():
+            self.assertEqual(path.read_text(), concurrent_output.joinpath(path.name).read_text())
+
+    def test_io_concurrency_stop_on_first_failure(self):
+        with self.assertRaises(exceptions.StartEndMismatch):
+            self.run_workflow(workers=1, stop_on_first_failure=True, io_concurrency=4)
+
+    def test_io_concurrency_write_failures(self):
+        # output files which cannot be written are reported in order
+        for i in (7, 3):
+            Path(self.tmpdir.name).joinpath("output_1_4", f"snippet_{i}.md").mkdir(parents=True)
+        examples, _, failures = self.run_workflow(workers=1, io_concurrency=4)
+        self.assertEqual(
+            [os.path.basename(path) for path, _ in failures], ["sample_broken.txt", "snippet_3.md", "snippet_7.md"]
+        )
+
+
+class TestPrefilter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config = Config()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, text):
+        path = str(Path(self.tmpdir.name).joinpath("sample.txt"))
+        with open(path, "w", encoding="utf8") as fh:
+            fh.write(text)
+        return path
+
+    def test_skips_files_without_markers(self):
+        path = self.write("assert nothing_to_see_here\n")
+        examples, line_ranges, failures, file_stats = workflow._parse_file(self.config, path)
+        self.assertEqual((examples, failures), ({}, []))
+        self.assertTrue(file_stats.skipped)
+        self.assertEqual(file_stats.bytes_read, 27)
+        self.assertEqual(file_stats.lines_parsed, 0)
+
+    def test_skips_empty_files(self):
+        path = self.write("")
+        examples, line_ranges, failures, file_stats = workflow._parse_file(self.config, path)
+        self.assertEqual((examples, failures), ({}, []))
+        self.assertTrue(file_stats.skipped)
+
+    def test_parses_files_with_stray_markers(self):
+        path = self.write("".join([P.A, P.stop]))
+        examples, line_ranges, failures, file_stats = workflow._parse_file(self.config, path)
+        self.assertFalse(file_stats.skipped)
+        self.assertIn("StartEndMismatch", failures[0][1])
+
+    def test_parses_files_with_examples(self):
+        path = self.write(Test.text)
+        examples, line_ranges, failures, file_stats = workflow._parse_file(self.config, path)
+        self.assertFalse(file_stats.skipped)
+        self.assertEqual(len(examples), 1)
+        self.assertEqual(file_stats.lines_parsed, Test.text.count("\n"))
+
+    def test_line_endings(self):
+        # as in text mode, whatever the line breaks
+        for newline in ["\n", "\r\n", "\r"]:
+            with self.subTest(newline=repr(newline)):
+                path = self.write("")
+                with open(path, "w", encoding="utf8", newline=newline) as fh:
+                    fh.write(Test.text)
+                examples, line_ranges, failures, file_stats = workflow._parse_file(self.config, path)
+                self.assertEqual((list(examples), failures), ([(path, 1, Test.example_name)], []))
+                self.assertEqual("\n".join(examples[(path, 1, Test.example_name)]), P.sample_output)
+                self.assertEqual(file_stats.lines_parsed, Test.text.count("\n"))
+
+    def test_skips_binary_files(self):
+        path = self.write("\0" + Test.text)
+        examples, line_ranges, failures, file_stats = workflow._parse_file(self.config, path)
+        self.assertEqual((examples, failures), ({}, []))
+        self.assertTrue(file_stats.skipped)
+
+    def test_encodings(self):
+        self.config.project_root = self.tmpdir.name
+        text = Test.text.replace(Test.example_name, "caf\xe9")
+        for encoding in ["latin-1", "utf-16"]:
+            with self.subTest(encoding=encoding):
+                self.config.encodings = {"*.txt": encoding}
+                path = self.write("")
+                with open(path, "w", encoding=encoding) as fh:
+                    fh.write(text)
+                examples, line_ranges, failures, file_stats = workflow._parse_file(self.config, path)
+                self.assertEqual((list(examples), failures), ([(path, 1, "caf\xe9")], []))
+                self.assertEqual("\n".join(examples[(path, 1, "caf\xe9")]), P.sample_output)
+
+        # other encodings are not detected, files in utf-16 look binary
+        self.config.encodings = dict()
+        examples, line_ranges, failures, file_stats = workflow._parse_file(self.config, path)
+        self.assertTrue(file_stats.skipped)
+        with open(path, "w", encoding="latin-1") as fh:
+            fh.write(text)
+        examples, line_ranges, failures, file_stats = workflow._parse_file(self.config, path)
+        self.assertIn("UnicodeDecodeError", failures[0][1])
+
+
+class TestWatcher(SampleProject, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.paths = [self.write(f"sample{i}.txt", f"snippet {i}") for i in range(3)]
+        self.watcher = workflow.Watcher(self.make_config(output_template="{{{code}}}\n"))
+        self.watcher.start()
+
+    def test_updates_changed_files(self):
+        self.assertEqual(self.outputs(), ["snippet_0.md", "snippet_1.md", "snippet_2.md"])
+        os.utime(Path(self.root).joinpath("output", "snippet_0.md"), ns=(0, 0))
+
+        self.write("sample1.txt", "snippet 1", "snippet 3")
+        self.assertEqual(self.watcher.update([self.paths[1]]), [])
+
+        self.assertEqual(self.outputs(), ["snippet_0.md", "snippet_1.md", "snippet_2.md", "snippet_3.md"])
+        self.assertEqual(os.stat(Path(self.root).joinpath("output", "snippet_0.md")).st_mtime_ns, 0)
+        with open(Path(self.root).joinpath("output", "snippet_1.md"), encoding="utf8") as fh:
+            # rewritten rather than appended to
+            self.assertEqual(fh.read(), P.sample_output + "\n")
+
+    def test_removed_examples(self):
+        os.remove(self.paths[2])
+        self.write("sample1.txt")
+        self.assertEqual(self.watcher.update([self.paths[1], self.paths[2]]), [])
+        self.assertEqual(self.outputs(), ["snippet_0.md"])
+        self.assertEqual(self.watcher.paths, self.paths[:2])
+
+    def test_duplicates(self):
+        self.write("sample1.txt", "snippet 1", "snippet 0")
+        failures = self.watcher.update([self.paths[1]])
+        self.assertEqual(len(failures), 1)
+        self.assertIn("DuplicateName", failures[0][1])
+
+        # the name can be used once the other example is renamed
+        self.write("sample0.txt", "snippet 4")
+        self.assertEqual(self.watcher.update([self.paths[0], self.paths[1]]), [])
+        self.assertEqual(self.outputs(), ["snippet_0.md", "snippet_1.md", "snippet_2.md", "snippet_4.md"])
+
+    def test_unsupported_options(self):
+        for options in [dict(shard="1/2"), dict(since="HEAD"), dict(profiles=dict(a=dict()))]:
+            with self.subTest(options=options):
+                with self.assertRaises(ValueError):
+                    workflow.Watcher(self.make_config(**options))
+
+    def test_new_input_files(self):
+        # only changes to files matching the input globs start a search for new files
+        self.assertTrue(self.watcher.is_input(str(Path(self.root).joinpath("sample9.txt"))))
+        for name in [".sample1.txt.swp", "sample1.txt~", "sample1.txt.0123456789abcdef.tmp", "output/snippet_0.md"]:
+            with self.subTest(name=name):
+                self.assertFalse(self.watcher.is_input(str(Path(self.root).joinpath(name))))
+
+
+class TestSince(SampleProject, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        make_repository(self.root)
+        self.paths = [self.write(f"sample{i}.txt", f"snippet {i}") for i in range(3)]
+        commit(self.root)
+
+    def run_since(self, **options):
+        options.setdefault("output_append", False)
+        options.setdefault("since", "HEAD")
+        return workflow.run(self.make_config(**options))
+
+    def test_writes_changed_files_only(self):
+        self.write("sample1.txt", "snippet 1", "snippet 3")
+        self.write("sample4.txt", "snippet 4")
+        examples, paths, failures = self.run_since()
+        self.assertEqual(failures, [])
+        self.assertEqual(len(examples), 5)
+        self.assertEqual(self.outputs(), ["snippet_1.md", "snippet_3.md", "snippet_4.md"])
+
+    def test_duplicates_with_unchanged_files(self):
+        self.write("sample1.txt", "snippet 0")
+        with self.assertRaises(exceptions.DuplicateName):
+            self.run_since()
+
+    def test_unchanged_files_from_cache(self):
+        cache_path = str(Path(self.root).joinpath(".cache.json"))
+        self.run_since(since=None, cache_path=cache_path)
+        self.write("sample1.txt", "snippet 0")
+        with mock.patch.object(workflow, "_parse_file", wraps=workflow._parse_file) as parse_file:
+            with self.assertRaises(exceptions.DuplicateName):
+                self.run_since(cache_path=cache_path)
+        self.assertEqual([args[1] for args, _ in parse_file.call_args_list], [self.paths[1]])
+
+    def test_unchanged_files_from_name_index(self):
+        name_index_path = str(Path(self.root).joinpath(".names.json"))
+        self.run_since(since=None, name_index_path=name_index_path)
+        self.write("sample1.txt", "snippet 1", "snippet 3")
+        with mock.patch.object(workflow, "_parse_file", wraps=workflow._parse_file) as parse_file:
+            examples, paths, failures = self.run_since(name_index_path=name_index_path)
+        self.assertEqual([args[1] for args, _ in parse_file.call_args_list], [self.paths[1]])
+        self.assertEqual((len(examples), failures), (2, []))
+
+        self.write("sample1.txt", "snippet 0")
+        with self.assertRaises(exceptions.DuplicateName):
+            self.run_since(name_index_path=name_index_path)
+
+    def test_names_exchanged_with_name_index(self):
+        name_index_path = str(Path(self.root).joinpath(".names.json"))
+        for since in [None, "HEAD"]:
+            with self.subTest(since=since):
+                self.write("sample0.txt", "snippet 0")
+                self.write("sample1.txt", "snippet 1")
+                self.run_since(since=None, name_index_path=name_index_path)
+                self.write("sample0.txt", "snippet 1")
+                self.write("sample1.txt", "snippet 0")
+                # the names previously indexed for the changed files are not duplicates of their new names
+                examples, paths, failures = self.run_since(
+                    since=since, name_index_path=name_index_path, stop_on_first_failure=True
+                )
+                self.assertEqual(failures, [])
+
+    def test_unchanged_files_sharing_output_files(self):
+        name_index_path = str(Path(self.root).joinpath(".names.json"))
+        self.run_since(since=None, name_index_path=name_index_path, output_file_name_template="all.md")
+        self.write("sample1.txt", "snippet 1", "snippet 3")
+        with mock.patch.object(workflow, "_parse_file", wraps=workflow._parse_file) as parse_file:
+            self.run_since(name_index_path=name_index_path, output_file_name_template="all.md", output_append=True)
+        self.assertEqual(parse_file.call_count, 3)
+
+
+class TestProfiles(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+        for name, example_name in [("a.py", "python 1"), ("b.cpp", "cpp 1"), ("c.md", "shared 1")]:
+            with open(Path(self.root).joinpath(name), "w", encoding="utf8") as fh:
+                fh.write(Test.text.replace(Test.example_name, example_name))
+        self.config = Config()
+        self.config.project_root = self.root
+        self.config.output_template = "{{comment_prefix}}{{{code}}}\n"
+        self.config.profiles = dict(
+            python=dict(input_glob=["*.py", "*.md"], output_dir="python"),
+            cpp=dict(input_glob=["*.cpp", "*.md"], output_dir="cpp", comment_prefix="// "),
+        )
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def outputs(self, directory):
+        return sorted(path.name for path in Path(self.root).joinpath(directory).iterdir())
+
+    def test_profiles(self):
+        with mock.patch.object(workflow, "_parse_file", wraps=workflow._parse_file) as parse_file:
+            examples, paths, failures = workflow.run(self.config)
+        self.assertEqual((len(examples), len(paths), failures), (3, 3, []))
+        self.assertEqual(self.outputs("python"), ["python_1.md", "shared_1.md"])
+        self.assertEqual(self.outputs("cpp"), ["cpp_1.md", "shared_1.md"])
+        with open(Path(self.root).joinpath("cpp", "shared_1.md"), encoding="utf8") as fh:
+            self.assertTrue(fh.read().startswith("// "))
+        # the file of both profiles is only parsed once
+        self.assertEqual(parse_file.call_count, 3)
+
+    def test_other_parsing_options(self):
+        self.config.profiles["cpp"]["replacements"] = {"items": "elements"}
+        with mock.patch.object(workflow, "_parse_file", wraps=workflow._parse_file) as parse_file:
+            workflow.run(self.config)
+        self.assertEqual(parse_file.call_count, 4)
+        with open(Path(self.root).joinpath("cpp", "shared_1.md"), encoding="utf8") as fh:
+            self.assertIn("elements", fh.read())
+
+    def test_duplicates_within_profiles(self):
+        # each profile has its own names
+        with open(Path(self.root).joinpath("d.cpp"), "w", encoding="utf8") as fh:
+            fh.write(Test.text.replace(Test.example_name, "python 1"))
+        self.assertEqual(workflow.run(self.config)[2], [])
+
+        with open(Path(self.root).joinpath("d.cpp"), "w", encoding="utf8") as fh:
+            fh.write(Test.text.replace(Test.example_name, "cpp 1"))
+        with self.assertRaises(exceptions.DuplicateName):
+            workflow.run(self.config)
+
+    def test_watch(self):
+        with self.assertRaises(ValueError):
+            workflow.Watcher(self.config)
+
+
+class TestStats(Test):
+    def test_read(self):
+        with open(self.tmp_fp, "w", encoding="utf8") as fh:
+            fh.write(self.text)
+        other_fp = str(Path(self.tmpdir.name).joinpath("other.txt"))
+        with open(other_fp, "w", encoding="utf8") as fh:
+            fh.write("no examples\n")
+
+        config = Config()
+        config.input_glob = str(Path(self.tmpdir.name).joinpath("*.txt"))
+        config.output_dir = self.tmpdir.name
+        stats = Stats()
+        workflow.run(config, stats)
+
+        self.assertEqual(list(stats.stage_seconds), ["find", "cache", "parse", "duplicates", "write"])
+        self.assertEqual((stats.files_found, stats.files_skipped, stats.cache_hits), (2, 1, 0))
+        self.assertEqual(stats.bytes_read, len(self.text) + len("no examples\n"))
+        self.assertEqual(stats.lines_parsed, self.text.count("\n"))
+        self.assertEqual((stats.examples_found, stats.outputs_written), (1, 1))
+        self.assertEqual(sorted(path for path, _ in stats.slowest_files()), sorted([self.tmp_fp, other_fp]))
+        self.assertIn("examples: 1 found", stats.report())